@@ -0,0 +1,99 @@
+"""Dashboard load latency: separate requests vs. one /api/batch call.
+
+The dashboard needs ``/api/auth/me``, the first page of ``/api/expenses``
+and the month's ``/api/expenses/summary/monthly``. Against a running server,
+each round-trip time is simulated by delaying every request on the client
+side. The script times three ways of loading the dashboard:
+
+* ``sequential``: the three GETs one after another
+* ``parallel``: the three GETs at once on separate connections
+* ``batch``: a single POST /api/batch
+
+    cd backend && uvicorn server:app &   # MONGO_URL/DB_NAME pointed at the bench db
+    python benchmarks/bench_batch.py [--rtt-ms 0 50 150 300]
+"""
+import argparse
+import asyncio
+import json
+from datetime import date
+
+import httpx
+
+from common import BENCH_BASE_URL, CATEGORIES, Timer, register_user, summarize
+
+MONTH = date.today().strftime("%Y-%m")
+DASHBOARD = [
+    ("me", "/api/auth/me"),
+    ("expenses", "/api/expenses?limit=20"),
+    ("summary", f"/api/expenses/summary/monthly?month={MONTH}"),
+]
+
+
+class DelayedTransport(httpx.AsyncBaseTransport):
+    """Adds a fixed round trip to every request, as a slow network would."""
+
+    def __init__(self, rtt: float, **kwargs):
+        self.rtt = rtt
+        self.inner = httpx.AsyncHTTPTransport(**kwargs)
+
+    async def handle_async_request(self, request):
+        await asyncio.sleep(self.rtt)
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+async def sequential(http, headers):
+    for _, path in DASHBOARD:
+        (await http.get(path, headers=headers)).raise_for_status()
+
+
+async def parallel(http, headers):
+    responses = await asyncio.gather(*(http.get(path, headers=headers) for _, path in DASHBOARD))
+    for response in responses:
+        response.raise_for_status()
+
+
+async def batch(http, headers):
+    response = await http.post("/api/batch", headers=headers, json={
+        "requests": [{"id": name, "path": path} for name, path in DASHBOARD]
+    })
+    response.raise_for_status()
+    assert all(item["status"] == 200 for item in response.json()["responses"])
+
+
+async def measure(rtt_ms: float, headers, repeats: int) -> dict:
+    transport = DelayedTransport(rtt_ms / 1000, limits=httpx.Limits(max_connections=6))
+    results = {}
+    async with httpx.AsyncClient(base_url=BENCH_BASE_URL, transport=transport, timeout=60) as http:
+        for name, load in (("sequential", sequential), ("parallel", parallel), ("batch", batch)):
+            await load(http, headers)  # warm up connections
+            samples = []
+            for _ in range(repeats):
+                with Timer() as t:
+                    await load(http, headers)
+                samples.append(t.elapsed)
+            results[name] = summarize(samples)
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, nargs="+", default=[0, 50, 150, 300], help="simulated round trips")
+    parser.add_argument("--repeats", type=int, default=30, help="dashboard loads per strategy and RTT")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=BENCH_BASE_URL, timeout=60) as http:
+        _, headers = await register_user(http)
+        for i in range(100):
+            (await http.post("/api/expenses", headers=headers, json={
+                "amount": 10 + i, "category": CATEGORIES[i % len(CATEGORIES)],
+                "description": f"Dashboard bench {i}", "date": f"{MONTH}-{i % 28 + 1:02d}",
+            })).raise_for_status()
+
+    print(json.dumps({f"{rtt:g}ms": await measure(rtt, headers, args.repeats) for rtt in args.rtt_ms}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+"""Per-request overhead of the CORS middleware stack.
+
+Drives a small Starlette app directly over ASGI (no sockets, no database)
+through three stacks:
+
+* ``none``: the app alone, as a baseline
+* ``previous``: the ``BaseHTTPMiddleware`` header hook plus Starlette's
+  ``CORSMiddleware`` the server used before ``cors.py``
+* ``cors``: the pure-ASGI ``cors.CORSMiddleware`` the server uses now
+
+for a small JSON response, a large streamed response (time to first and
+last byte) and a preflight. Overhead is reported against the baseline.
+
+    cd backend && python benchmarks/bench_cors_middleware.py
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.cors import CORSMiddleware as StarletteCORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from common import Timer, summarize
+
+from cors import CORSMiddleware
+
+STREAM_CHUNK = b"x" * 64 * 1024
+ORIGIN = b"https://vividexpense-frontend.onrender.com"
+
+
+class AddCORSHeadersMiddleware(BaseHTTPMiddleware):
+    """The header hook server.py used before cors.py, kept verbatim for comparison."""
+
+    async def dispatch(self, request, call_next):
+        if request.method == "OPTIONS":
+            return Response(
+                status_code=200,
+                headers={
+                    "Access-Control-Allow-Origin": "*",
+                    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS",
+                    "Access-Control-Allow-Headers": "*",
+                    "Access-Control-Max-Age": "86400",
+                },
+            )
+        response = await call_next(request)
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
+        response.headers["Access-Control-Allow-Headers"] = "*"
+        return response
+
+
+def build_app(stream_chunks: int) -> Starlette:
+    async def small_json(request):
+        return JSONResponse({"total": 1234.5, "count": 12, "by_category": {"Food": 800.0, "Bills": 434.5}})
+
+    async def large_stream(request):
+        async def chunks():
+            for _ in range(stream_chunks):
+                yield STREAM_CHUNK
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    return Starlette(routes=[Route("/small", small_json), Route("/stream", large_stream)])
+
+
+def stacks(stream_chunks: int):
+    previous = build_app(stream_chunks)
+    previous.add_middleware(AddCORSHeadersMiddleware)
+    previous.add_middleware(
+        StarletteCORSMiddleware, allow_credentials=False, allow_origins=["*"],
+        allow_methods=["*"], allow_headers=["*"], expose_headers=["*"],
+    )
+    current = build_app(stream_chunks)
+    current.add_middleware(CORSMiddleware, allow_origins=["*"])
+    return {"none": build_app(stream_chunks), "previous": previous, "cors": current}
+
+
+async def call(app, method: str, path: str, extra_headers=()):
+    """One request over ASGI; returns (seconds to first body byte, seconds to last, response headers)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "server": ("bench", 80), "client": ("127.0.0.1", 50000),
+        "headers": [(b"host", b"bench"), (b"origin", ORIGIN), *extra_headers],
+    }
+    disconnect = asyncio.Event()
+    headers = []
+    first = None
+
+    async def receive():
+        if not scope.get("_sent"):
+            scope["_sent"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first
+        if message["type"] == "http.response.start":
+            headers.extend(message["headers"])
+        elif message["type"] == "http.response.body" and first is None:
+            first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with Timer() as timer:
+        await app(scope, receive, send)
+    disconnect.set()
+    return first, timer.elapsed, headers
+
+
+async def measure(app, method, path, requests, extra_headers=()):
+    for _ in range(min(50, requests)):
+        await call(app, method, path, extra_headers)
+    first_byte, total = [], []
+    for _ in range(requests):
+        first, elapsed, _ = await call(app, method, path, extra_headers)
+        first_byte.append(first)
+        total.append(elapsed)
+    return first_byte, total
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000, help="requests per case for small responses")
+    parser.add_argument("--stream-requests", type=int, default=100, help="requests per case for the stream")
+    parser.add_argument("--stream-mb", type=int, default=16, help="size of the streamed response")
+    args = parser.parse_args()
+
+    stream_chunks = args.stream_mb * 1024 * 1024 // len(STREAM_CHUNK)
+    apps = stacks(stream_chunks)
+    preflight = ((b"access-control-request-method", b"POST"), (b"access-control-request-headers", b"authorization"))
+    cases = {
+        "small_json": ("GET", "/small", args.requests, ()),
+        "stream": ("GET", "/stream", args.stream_requests, ()),
+        "preflight": ("OPTIONS", "/small", args.requests, preflight),
+    }
+
+    results = {"stream_mb": args.stream_mb}
+    for case, (method, path, requests, extra) in cases.items():
+        baseline = None
+        results[case] = {}
+        for name, app in apps.items():
+            if case == "preflight" and name == "none":
+                continue
+            first_byte, total = await measure(app, method, path, requests, extra)
+            row = {"total": summarize(total)}
+            if case == "stream":
+                row["first_byte"] = summarize(first_byte)
+            if name == "none":
+                baseline = row["total"]["mean_ms"]
+            elif baseline is not None:
+                row["overhead_us"] = round((row["total"]["mean_ms"] - baseline) * 1000, 1)
+            _, _, headers = await call(app, method, path, extra)
+            row["cors_headers"] = sorted(
+                header.decode() for header, _ in headers if header.startswith(b"access-control-")
+            )
+            results[case][name] = row
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
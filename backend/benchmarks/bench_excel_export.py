@@ -0,0 +1,98 @@
+"""Excel export: in-memory workbook vs. the streaming write-only export.
+
+Each case runs in a fresh subprocess so its peak RSS is measured in
+isolation. Rows are synthetic and fed in cursor-sized batches, so no
+database is needed.
+
+    cd backend && python benchmarks/bench_excel_export.py
+"""
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+from common import synthetic_expenses
+
+SIZES = [10_000, 100_000]
+BATCH_SIZE = 1000
+
+
+def legacy_export(rows: int) -> dict:
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
+
+    start = time.perf_counter()
+    expenses = list(synthetic_expenses("bench", "2024-03", rows))
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Expenses"
+    ws.append(['Date', 'Category', 'Description', 'Amount (₹)'])
+    for cell in ws[1]:
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="6366F1", end_color="6366F1", fill_type="solid")
+    for exp in expenses:
+        ws.append([exp['date'], exp['category'], exp['description'], exp['amount']])
+    ws.append([])
+    ws.append(['Total', '', '', sum(exp['amount'] for exp in expenses)])
+    buffer = BytesIO()
+    wb.save(buffer)
+    first_byte = time.perf_counter()
+    size = len(buffer.getvalue())
+    return {"ttfb_s": first_byte - start, "total_s": time.perf_counter() - start, "bytes": size}
+
+
+def streaming_export(rows: int) -> dict:
+    from exports import stream_excel
+
+    async def batches():
+        batch = []
+        for doc in synthetic_expenses("bench", "2024-03", rows):
+            batch.append(doc)
+            if len(batch) == BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def run():
+        start = time.perf_counter()
+        first_byte, size = None, 0
+        async for chunk in stream_excel(batches()):
+            first_byte = first_byte or time.perf_counter()
+            size += len(chunk)
+        return {"ttfb_s": first_byte - start, "total_s": time.perf_counter() - start, "bytes": size}
+
+    return asyncio.run(run())
+
+
+CASES = {"legacy": legacy_export, "streaming": streaming_export}
+
+
+def run_case(case: str, rows: int) -> None:
+    result = CASES[case](rows)
+    # ru_maxrss is in kilobytes on Linux
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    result = {k: round(v, 3) if isinstance(v, float) else v for k, v in result.items()}
+    print(json.dumps(result))
+
+
+def main():
+    results = []
+    for rows in SIZES:
+        for case in CASES:
+            out = subprocess.run(
+                [sys.executable, __file__, case, str(rows)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results.append({"rows": rows, "mode": case, **json.loads(out.strip().splitlines()[-1])})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        run_case(sys.argv[1], int(sys.argv[2]))
+    else:
+        main()
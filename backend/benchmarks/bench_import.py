@@ -0,0 +1,51 @@
+"""Bulk import throughput: one 50k-row CSV upload against a running server.
+
+    cd backend && uvicorn server:app &   # MONGO_URL/DB_NAME pointed at the bench db
+    python benchmarks/bench_import.py
+"""
+import asyncio
+import csv
+import io
+import json
+
+import httpx
+
+from common import BENCH_BASE_URL, Timer, register_user, synthetic_expenses
+
+ROWS = 50_000
+TARGET_ROWS_PER_MINUTE = 50_000
+
+
+def csv_upload(rows: int) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["amount", "category", "description", "date"])
+    for exp in synthetic_expenses("bench", "2024-03", rows):
+        writer.writerow([exp["amount"], exp["category"], exp["description"], exp["date"]])
+    return buffer.getvalue().encode("utf-8")
+
+
+async def main():
+    body = csv_upload(ROWS)
+    async with httpx.AsyncClient(base_url=BENCH_BASE_URL, timeout=600) as http:
+        _, headers = await register_user(http)
+        with Timer() as t:
+            response = await http.post(
+                "/api/expenses/import", headers=headers,
+                files={"file": ("history.csv", body, "text/csv")}
+            )
+        response.raise_for_status()
+    report = response.json()
+    rows_per_minute = report["inserted"] / t.elapsed * 60
+    print(json.dumps({
+        "rows": ROWS,
+        "inserted": report["inserted"],
+        "failed": report["failed"],
+        "seconds": round(t.elapsed, 2),
+        "rows_per_minute": round(rows_per_minute),
+        "meets_target": rows_per_minute >= TARGET_ROWS_PER_MINUTE,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
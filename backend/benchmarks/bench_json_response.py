@@ -0,0 +1,84 @@
+"""Encoding cost of the expense list response, per 1000 rows.
+
+Compares FastAPI's response_model path (validate every row through
+``List[Expense]``, then serialise) with the FastJSONResponse path used by
+``GET /api/expenses``, and checks both produce the same bytes. No database
+or server is needed.
+
+    cd backend && python benchmarks/bench_json_response.py
+"""
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from common import CATEGORIES, Timer, summarize
+
+import server
+
+ROWS = 1000
+REPEATS = 200
+
+
+def stored_rows(count: int, seed: int = 42):
+    """Rows as the list route reads them from Mongo (schema v2, naive UTC datetimes)."""
+    rng = random.Random(seed)
+    start = datetime(2024, 3, 1)
+    return [{
+        "id": str(uuid.uuid4()),
+        "user_id": "bench-user",
+        "amount": rng.randint(1_000, 500_000),
+        "category": rng.choice(CATEGORIES),
+        "description": f"Synthetic expense {rng.randint(1, 10 ** 6)} – café",
+        "date": start + timedelta(days=rng.randint(0, 27)),
+        "created_at": start + timedelta(seconds=rng.randint(0, 10 ** 6), microseconds=rng.randint(0, 999_999)),
+        "schema_version": server.EXPENSE_SCHEMA_VERSION,
+    } for _ in range(count)]
+
+
+def list_route_field():
+    for route in server.api_router.routes:
+        if getattr(route, "path", None) == "/api/expenses" and "GET" in route.methods:
+            return route.response_field
+    raise LookupError("GET /api/expenses not registered")
+
+
+async def response_model_json(field, rows) -> bytes:
+    """Current FastAPI: validate through the response model, dump with pydantic-core."""
+    return await serialize_response(field=field, response_content=[server.expense_from_doc(r) for r in rows], dump_json=True)
+
+
+async def response_model_dict(field, rows) -> bytes:
+    """Older FastAPI: validate, serialise to Python objects, then json.dumps via JSONResponse."""
+    content = await serialize_response(field=field, response_content=[server.expense_from_doc(r) for r in rows])
+    return JSONResponse(content).body
+
+
+async def fast_json(field, rows) -> bytes:
+    return server.FastJSONResponse([server.expense_json(r) for r in rows]).body
+
+
+async def main():
+    rows = stored_rows(ROWS)
+    field = list_route_field()
+    strategies = {"response_model_json": response_model_json, "response_model_dict": response_model_dict, "fast_json": fast_json}
+
+    expected = await fast_json(field, rows)
+    results = {"rows": ROWS}
+    for name, encode in strategies.items():
+        body = await encode(field, rows)
+        samples = []
+        for _ in range(REPEATS):
+            with Timer() as t:
+                await encode(field, rows)
+            samples.append(t.elapsed)
+        results[name] = {**summarize(samples), "bytes": len(body), "identical": body == expected}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
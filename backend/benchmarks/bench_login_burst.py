@@ -0,0 +1,70 @@
+"""GET /api/expenses latency while a burst of logins is in progress.
+
+bcrypt runs on the password pool, so read latency should stay flat while
+logins are being verified. The script samples /api/expenses at a steady
+rate, first alone and then during a login burst, and prints both latency
+summaries.
+
+    cd backend && uvicorn server:app &   # MONGO_URL/DB_NAME pointed at the bench db
+    python benchmarks/bench_login_burst.py
+"""
+import asyncio
+import json
+import time
+
+import httpx
+
+from common import BENCH_BASE_URL, register_user, summarize
+
+PASSWORD = "BenchPass123!"
+PHASE_SECONDS = 10
+SAMPLE_INTERVAL = 0.02
+LOGIN_CONCURRENCY = 32
+
+
+async def sample_reads(http, headers, stop_at):
+    samples = []
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = await http.get("/api/expenses", headers=headers, params={"limit": 50})
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(SAMPLE_INTERVAL)
+    return samples
+
+
+async def login_loop(http, email, stop_at):
+    logins = 0
+    while time.perf_counter() < stop_at:
+        response = await http.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+        logins += 1
+    return logins
+
+
+async def main():
+    limits = httpx.Limits(max_connections=LOGIN_CONCURRENCY + 8)
+    async with httpx.AsyncClient(base_url=BENCH_BASE_URL, limits=limits, timeout=60) as http:
+        email, headers = await register_user(http, PASSWORD)
+        for i in range(50):
+            await http.post("/api/expenses", headers=headers, json={
+                "amount": 10 + i, "category": "Food", "description": f"Burst {i}", "date": "2024-03-01"
+            })
+
+        idle = await sample_reads(http, headers, time.perf_counter() + PHASE_SECONDS)
+
+        stop_at = time.perf_counter() + PHASE_SECONDS
+        reads, *logins = await asyncio.gather(
+            sample_reads(http, headers, stop_at),
+            *(login_loop(http, email, stop_at) for _ in range(LOGIN_CONCURRENCY))
+        )
+
+    print(json.dumps({
+        "idle": summarize(idle),
+        "during_logins": summarize(reads),
+        "logins_per_second": round(sum(logins) / PHASE_SECONDS, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Monthly summary: Python-side aggregation vs. the server-side pipeline.
+
+Seeds 1k, 10k and 100k expenses into one month for a synthetic user and
+reports latency and reply bytes for both strategies.
+
+    cd backend && python benchmarks/bench_monthly_summary.py
+"""
+import asyncio
+import json
+import uuid
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from common import BENCH_DB_NAME, BENCH_MONGO_URL, Timer, seed_expenses, summarize
+
+from server import month_range, monthly_summary_pipeline
+
+SIZES = [1_000, 10_000, 100_000]
+REPEATS = 10
+MONTH = "2024-03"
+
+
+class ReplyBytes(monitoring.CommandListener):
+    """Sums the BSON size of every command reply (approximate wire bytes)."""
+
+    def __init__(self):
+        self.total = 0
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.total += len(bson.encode(event.reply))
+
+    def failed(self, event):
+        pass
+
+
+async def legacy_summary(db, user_id, start_date, next_month):
+    expenses = await db.expenses.find({
+        "user_id": user_id,
+        "date": {"$gte": start_date, "$lt": next_month}
+    }, {"_id": 0}).to_list(None)
+    category_totals, daily_totals = {}, {}
+    for exp in expenses:
+        category_totals[exp['category']] = category_totals.get(exp['category'], 0) + exp['amount']
+        daily_totals[exp['date']] = daily_totals.get(exp['date'], 0) + exp['amount']
+    return sum(exp['amount'] for exp in expenses), len(expenses), category_totals, daily_totals
+
+
+async def pipeline_summary(db, user_id, start_date, next_month):
+    return await db.expenses.aggregate(
+        monthly_summary_pipeline(user_id, start_date, next_month)
+    ).to_list(1)
+
+
+async def measure(db, listener, fn, user_id):
+    start_date, next_month = month_range(MONTH)
+    samples = []
+    listener.total = 0
+    for _ in range(REPEATS):
+        with Timer() as t:
+            await fn(db, user_id, start_date, next_month)
+        samples.append(t.elapsed)
+    result = summarize(samples)
+    result["reply_bytes"] = listener.total // REPEATS
+    return result
+
+
+async def main():
+    listener = ReplyBytes()
+    client = AsyncIOMotorClient(BENCH_MONGO_URL, event_listeners=[listener])
+    db = client[BENCH_DB_NAME]
+    await db.expenses.create_index([("user_id", 1), ("date", -1)])
+    results = []
+    try:
+        for size in SIZES:
+            user_id = f"bench-{uuid.uuid4()}"
+            await seed_expenses(db, user_id, MONTH, size)
+            results.append({
+                "expenses": size,
+                "legacy": await measure(db, listener, legacy_summary, user_id),
+                "pipeline": await measure(db, listener, pipeline_summary, user_id),
+            })
+            await db.expenses.delete_many({"user_id": user_id})
+    finally:
+        client.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
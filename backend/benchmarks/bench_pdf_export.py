@@ -0,0 +1,71 @@
+"""PDF export: single auto-sized Table vs. the chunked LongTable renderer.
+
+Renders synthetic 1k and 10k row reports in-process (no database needed)
+and prints the render time of each layout.
+
+    cd backend && python benchmarks/bench_pdf_export.py
+"""
+import json
+from io import BytesIO
+
+from common import Timer, synthetic_expenses
+
+from exports import pdf_row, render_pdf
+
+SIZES = [1_000, 10_000]
+MONTH = "2024-03"
+
+
+def legacy_render(month, expenses) -> bytes:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    total = sum(exp['amount'] for exp in expenses)
+    elements = [
+        Paragraph(f"<b>Expense Report - {month}</b>", styles['Title']), Spacer(1, 20),
+        Paragraph(f"<b>Total Expenses: ₹{total:,.2f}</b>", styles['Heading2']), Spacer(1, 20),
+    ]
+    table_data = [['Date', 'Category', 'Description', 'Amount (₹)']]
+    for exp in expenses:
+        table_data.append([exp['date'], exp['category'], exp['description'][:30], f"₹{exp['amount']:,.2f}"])
+    table = Table(table_data)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(table)
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def main():
+    results = []
+    for size in SIZES:
+        expenses = sorted(synthetic_expenses("bench", MONTH, size), key=lambda e: e['date'])
+        rows = [pdf_row(exp) for exp in expenses]
+        render_pdf(MONTH, rows[:10])  # build the cached styles outside the timing
+        with Timer() as legacy:
+            legacy_bytes = legacy_render(MONTH, expenses)
+        with Timer() as chunked:
+            chunked_bytes = render_pdf(MONTH, rows)
+        results.append({
+            "rows": size,
+            "legacy_s": round(legacy.elapsed, 3), "legacy_bytes": len(legacy_bytes),
+            "chunked_s": round(chunked.elapsed, 3), "chunked_bytes": len(chunked_bytes),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
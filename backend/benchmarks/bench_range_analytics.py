@@ -0,0 +1,74 @@
+"""A year of analytics: one range call vs. twelve monthly summaries.
+
+Seeds a year of expenses for a fresh user (as legacy documents without
+rollups, so every monthly summary has to aggregate its month) and times:
+
+- twelve sequential ``GET /api/expenses/summary/monthly`` calls
+- the same twelve calls issued concurrently
+- one ``GET /api/expenses/summary/range?bucket=month`` call
+
+Start the server with ``SUMMARY_CACHE_MAX_MB=0`` so repeated monthly calls
+are not served from the summary cache.
+
+    cd backend && python benchmarks/bench_range_analytics.py [ROWS]
+"""
+import asyncio
+import json
+import sys
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from common import BENCH_BASE_URL, BENCH_DB_NAME, BENCH_MONGO_URL, Timer, register_user, seed_expenses, summarize
+
+YEAR = 2024
+REPEATS = 10
+MONTHS = [f"{YEAR}-{m:02d}" for m in range(1, 13)]
+
+
+async def twelve_sequential(http, headers):
+    for month in MONTHS:
+        (await http.get("/api/expenses/summary/monthly", params={"month": month}, headers=headers)).raise_for_status()
+
+
+async def twelve_concurrent(http, headers):
+    responses = await asyncio.gather(*(
+        http.get("/api/expenses/summary/monthly", params={"month": month}, headers=headers) for month in MONTHS
+    ))
+    for response in responses:
+        response.raise_for_status()
+
+
+async def one_range(http, headers):
+    (await http.get("/api/expenses/summary/range", headers=headers, params={
+        "start_date": f"{YEAR}-01-01", "end_date": f"{YEAR}-12-31", "bucket": "month"
+    })).raise_for_status()
+
+
+async def main(rows: int):
+    client = AsyncIOMotorClient(BENCH_MONGO_URL)
+    db = client[BENCH_DB_NAME]
+    results = {"rows": rows}
+    async with httpx.AsyncClient(base_url=BENCH_BASE_URL, timeout=120) as http:
+        _, headers = await register_user(http)
+        user_id = (await http.get("/api/auth/me", headers=headers)).json()["id"]
+        for month in MONTHS:
+            await seed_expenses(db, user_id, month, rows // len(MONTHS))
+        try:
+            for name, fn in (("monthly_x12_sequential", twelve_sequential),
+                             ("monthly_x12_concurrent", twelve_concurrent),
+                             ("range_month_buckets", one_range)):
+                samples = []
+                for _ in range(REPEATS):
+                    with Timer() as t:
+                        await fn(http, headers)
+                    samples.append(t.elapsed)
+                results[name] = summarize(samples)
+        finally:
+            await db.expenses.delete_many({"user_id": user_id})
+            client.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 120_000))
@@ -0,0 +1,68 @@
+"""Storage schema v1 (strings/floats) vs. v2 (BSON dates/integer paise).
+
+Seeds legacy documents into the benchmark database, records document size,
+index size and monthly summary latency, runs the online migration and
+records the same numbers again.
+
+    cd backend && python benchmarks/bench_schema_migration.py [ROWS]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+
+from common import BENCH_DB_NAME, Timer, seed_expenses, summarize
+
+import manage
+import server
+from indexes import ensure_indexes
+
+MONTHS = ["2024-01", "2024-02", "2024-03", "2024-04"]
+REPEATS = 20
+
+
+async def measure(db, user_id) -> dict:
+    stats = await db.command("collStats", "expenses")
+    start_date, next_month = server.month_range("2024-03")
+    samples = []
+    for _ in range(REPEATS):
+        with Timer() as t:
+            await db.expenses.aggregate(server.monthly_summary_pipeline(user_id, start_date, next_month)).to_list(1)
+        samples.append(t.elapsed)
+    return {
+        "avg_doc_bytes": stats.get("avgObjSize"),
+        "data_bytes": stats.get("size"),
+        "index_bytes": stats.get("totalIndexSize"),
+        "summary": summarize(samples),
+    }
+
+
+async def main(rows: int):
+    db = server.connect_mongo()
+    # Drops and migrates the whole collection: never run this against the app's data
+    assert db.name == BENCH_DB_NAME, f"refusing to drop {db.name}.expenses"
+    await db.expenses.drop()
+    await db.migrations.delete_many({"_id": manage.MIGRATION_ID})
+    await ensure_indexes(db)
+    user_id = f"bench-{uuid.uuid4()}"
+    for month in MONTHS:
+        await seed_expenses(db, user_id, month, rows // len(MONTHS))
+
+    before = await measure(db, user_id)
+    with Timer() as migration:
+        await manage.cmd_migrate_schema(argparse.Namespace(batch_size=1000, pause=0.0, restart=True))
+    after = await measure(db, user_id)
+
+    print(json.dumps({
+        "database": BENCH_DB_NAME,
+        "rows": rows,
+        "v1": before,
+        "v2": after,
+        "migration_s": round(migration.elapsed, 2),
+    }, indent=2))
+    server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,98 @@
+"""Description search and autocomplete latency at 100k expenses per user.
+
+Seeds one user with expenses whose descriptions are drawn from a realistic
+vocabulary, rebuilds their suggestions, then times search pages (first page,
+with a date range, and a follow-up keyset page) and prefix lookups against a
+running server. The target is p95 under 50 ms.
+
+    cd backend && python benchmarks/bench_search.py [ROWS]
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from common import BENCH_BASE_URL, CATEGORIES, Timer, register_user, summarize
+
+import manage
+import server
+
+REPEATS = 50
+TARGET_MS = 50
+MERCHANTS = ["Uber", "Ola", "Swiggy", "Zomato", "Amazon", "Flipkart", "BigBasket", "Netflix", "Airtel",
+             "Starbucks", "Apollo Pharmacy", "IndiGo", "Decathlon", "BookMyShow", "Dunzo", "Rapido"]
+WHAT = ["ride to office", "ride home", "dinner", "lunch", "groceries", "subscription", "recharge",
+        "coffee", "medicines", "flight", "shoes", "movie tickets", "delivery", "airport transfer"]
+
+
+def expenses(user_id: str, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    for _ in range(count):
+        yield {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "amount": rng.randint(1_000, 500_000),
+            "category": rng.choice(CATEGORIES),
+            "description": f"{rng.choice(MERCHANTS)} {rng.choice(WHAT)}",
+            "date": start + timedelta(days=rng.randint(0, 729)),
+            "created_at": datetime.now(timezone.utc),
+            "schema_version": server.EXPENSE_SCHEMA_VERSION,
+        }
+
+
+async def timed(http, headers, path, params):
+    samples = []
+    for _ in range(REPEATS):
+        with Timer() as t:
+            (await http.get(path, params=params, headers=headers)).raise_for_status()
+        samples.append(t.elapsed)
+    result = summarize(samples)
+    result["under_target"] = result["p95_ms"] < TARGET_MS
+    return result
+
+
+async def main(rows: int):
+    db = server.connect_mongo()
+    async with httpx.AsyncClient(base_url=BENCH_BASE_URL, timeout=60) as http:
+        _, headers = await register_user(http)
+        user_id = (await http.get("/api/auth/me", headers=headers)).json()["id"]
+        batch = []
+        for doc in expenses(user_id, rows):
+            batch.append(doc)
+            if len(batch) == 5000:
+                await db.expenses.insert_many(batch, ordered=False)
+                batch = []
+        if batch:
+            await db.expenses.insert_many(batch, ordered=False)
+        await manage.cmd_rebuild_suggestions(argparse.Namespace(user=user_id))
+
+        try:
+            first = await http.get("/api/expenses", params={"search": "uber", "limit": 50}, headers=headers)
+            cursor = first.headers["X-Next-Cursor"]
+            results = {
+                "rows": rows,
+                "search": await timed(http, headers, "/api/expenses", {"search": "uber", "limit": 50}),
+                "search_range": await timed(http, headers, "/api/expenses", {
+                    "search": "swiggy dinner", "start_date": "2024-03-01", "end_date": "2024-03-31", "limit": 50
+                }),
+                "search_next_page": await timed(http, headers, "/api/expenses", {
+                    "search": "uber", "limit": 50, "cursor": cursor
+                }),
+                "suggest_description": await timed(http, headers, "/api/expenses/suggestions", {"q": "ub"}),
+                "suggest_any": await timed(http, headers, "/api/expenses/suggestions", {"q": "s"}),
+            }
+        finally:
+            await db.expenses.delete_many({"user_id": user_id})
+            await db.suggestions.delete_many({"user_id": user_id})
+    print(json.dumps(results, indent=2))
+    server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,81 @@
+"""Throughput scaling of the multi-worker server at 1, 2, 4 and 8 workers.
+
+Runs ``loadtest.py``'s request mix against ``gunicorn -c gunicorn.conf.py``
+once per worker count (the benchmark database is reseeded each time) and
+reports total RPS, p95/p99 latency, speedup over one worker and scaling
+efficiency (speedup / workers).
+
+The load generator is a single asyncio process on the same machine.
+``client_cpu`` is the share of one core it used; close to 1.0 means the
+client, not the server, was the limit and the higher worker counts are a
+lower bound. Worker counts above ``available_cpus`` can't be expected to
+scale.
+
+    cd backend && python benchmarks/bench_worker_scaling.py --duration 30 --output scaling.json
+"""
+import argparse
+import asyncio
+import json
+import runpy
+import time
+
+import loadtest
+from common import BACKEND_DIR
+
+WORKER_COUNTS = (1, 2, 4, 8)
+ROUTES = ("GET /api/expenses", "GET /api/expenses/summary/monthly", "POST /api/expenses", "POST /api/auth/login")
+
+
+async def run_once(args, workers: int) -> dict:
+    run_args = argparse.Namespace(**{**vars(args), "workers": workers, "launcher": "gunicorn", "base_url": None})
+    cpu_before, wall_before = time.process_time(), time.perf_counter()
+    report = await loadtest.run(run_args)
+    client_cpu = (time.process_time() - cpu_before) / (time.perf_counter() - wall_before)
+    return {
+        "rps": report["total"]["rps"],
+        "errors": report["total"]["errors"],
+        "client_cpu": round(client_cpu, 2),
+        "routes": {
+            route: {key: report["routes"][route][key] for key in ("rps", "p50_ms", "p95_ms", "p99_ms")}
+            for route in ROUTES if route in report["routes"]
+        },
+    }
+
+
+async def main(args) -> dict:
+    results = {}
+    for workers in args.workers:
+        results[workers] = await run_once(args, workers)
+    baseline = results[args.workers[0]]["rps"] / args.workers[0]
+    for workers, result in results.items():
+        speedup = result["rps"] / baseline if baseline else 0.0
+        result["speedup"] = round(speedup, 2)
+        result["efficiency"] = round(speedup / workers, 2)
+    return {
+        # What gunicorn.conf.py would pick as the worker count on this machine
+        "available_cpus": runpy.run_path(str(BACKEND_DIR / "gunicorn.conf.py"))["available_cpus"](),
+        "commit": loadtest.git_commit(),
+        "config": {k: getattr(args, k) for k in ("users", "expenses", "concurrency", "duration", "warmup", "seed")},
+        "workers": {str(workers): result for workers, result in results.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=list(WORKER_COUNTS), help="worker counts to run")
+    parser.add_argument("--users", type=int, default=20, help="seeded users")
+    parser.add_argument("--expenses", type=int, default=1000, help="seeded expenses per user")
+    parser.add_argument("--concurrency", type=int, default=128, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=1, help="random seed for data and the request mix")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(asyncio.run(main(args)), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
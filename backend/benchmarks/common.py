@@ -0,0 +1,97 @@
+"""Shared helpers for the backend benchmarks.
+
+The benchmarks talk to a throwaway database on a local mongod
+(``BENCH_MONGO_URL``, default ``mongodb://localhost:27017``) and never touch
+the database configured for the app. HTTP benchmarks expect a server started
+against that database at ``BENCH_BASE_URL`` (default ``http://localhost:8000``).
+"""
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+BENCH_BASE_URL = os.environ.get('BENCH_BASE_URL', 'http://localhost:8000')
+BENCH_MONGO_URL = os.environ.get('BENCH_MONGO_URL', 'mongodb://localhost:27017')
+BENCH_DB_NAME = os.environ.get('BENCH_DB_NAME', 'vividexpense_bench')
+
+# server.py reads these at import time; point it at the benchmark database
+# even when the shell already exports the app's own (as on a Render shell)
+os.environ['MONGO_URL'] = BENCH_MONGO_URL
+os.environ['DB_NAME'] = BENCH_DB_NAME
+
+CATEGORIES = ["Food", "Transport", "Shopping", "Entertainment", "Bills", "Health", "Education", "Other"]
+
+
+def synthetic_expenses(user_id: str, month: str, count: int, seed: int = 42):
+    """Yield ``count`` expense documents spread over the days of ``month``."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "amount": round(rng.uniform(10, 5000), 2),
+            "category": rng.choice(CATEGORIES),
+            "description": f"Synthetic expense {rng.randint(1, 10 ** 6)}",
+            "date": f"{month}-{rng.randint(1, 28):02d}",
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+
+
+async def seed_expenses(db, user_id: str, month: str, count: int, batch_size: int = 5000):
+    """Insert ``count`` synthetic expenses for ``user_id`` in ``month``."""
+    batch = []
+    for doc in synthetic_expenses(user_id, month, count):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await db.expenses.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.expenses.insert_many(batch, ordered=False)
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (pct in 0-100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency summary (milliseconds) for a list of durations in seconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+class Timer:
+    """Context manager recording the elapsed wall time in ``elapsed``."""
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        return False
+
+
+async def register_user(http, password: str = "BenchPass123!"):
+    """Register a fresh user through the API; returns (email, auth headers)."""
+    email = f"bench_{uuid.uuid4().hex[:12]}@example.com"
+    response = await http.post("/api/auth/register", json={"name": "Bench", "email": email, "password": password})
+    response.raise_for_status()
+    return email, {"Authorization": f"Bearer {response.json()['token']}"}
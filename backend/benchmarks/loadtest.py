@@ -0,0 +1,310 @@
+"""Load test of the whole API against a local stack.
+
+Starts ``uvicorn server:app`` against the benchmark database on a local
+mongod (see common.py), seeds synthetic users and expenses, then drives a
+weighted mix of requests from concurrent async clients for a fixed time and
+writes a JSON report with RPS and p50/p95/p99 latency per route.
+
+    cd backend && python benchmarks/loadtest.py --users 20 --expenses 2000 \\
+        --concurrency 64 --duration 60 --output load-$(git rev-parse --short HEAD).json
+    python benchmarks/loadtest.py --compare load-old.json load-new.json
+
+Pass ``--base-url`` to load an already running server instead (it must use
+the benchmark database). The benchmark database is dropped before seeding.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Dict, List
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from common import BACKEND_DIR, BENCH_DB_NAME, BENCH_MONGO_URL, CATEGORIES, summarize
+
+PASSWORD = "LoadTest123!"
+MONTHS = 12
+FIRST_DAY = date(2024, 1, 1)
+
+# Route name -> relative weight in the request mix
+MIX = {
+    "GET /api/expenses": 25,
+    "GET /api/expenses?search": 4,
+    "GET /api/expenses/{id}": 8,
+    "POST /api/expenses": 10,
+    "PUT /api/expenses/{id}": 6,
+    "DELETE /api/expenses/{id}": 4,
+    "GET /api/expenses/summary/monthly": 20,
+    "GET /api/expenses/summary/range": 4,
+    "GET /api/expenses/suggestions": 6,
+    "GET /api/expenses/export/excel": 2,
+    "GET /api/expenses/export/pdf": 1,
+    "POST /api/auth/login": 4,
+    "POST /api/auth/register": 1,
+    "GET /api/auth/me": 5,
+}
+
+
+class Session:
+    """A seeded user: credentials, auth headers and ids of known expenses."""
+
+    def __init__(self, email: str, token: str):
+        self.email = email
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.expense_ids: List[str] = []
+
+
+def random_day(rng: random.Random) -> str:
+    return (FIRST_DAY + timedelta(days=rng.randint(0, MONTHS * 30))).isoformat()
+
+
+def random_expense(rng: random.Random) -> dict:
+    return {
+        "amount": round(rng.uniform(10, 5000), 2),
+        "category": rng.choice(CATEGORIES),
+        "description": f"{rng.choice(['Uber', 'Swiggy', 'Amazon', 'Rent', 'Coffee', 'Pharmacy'])} {rng.randint(1, 999)}",
+        "date": random_day(rng),
+    }
+
+
+def random_month(rng: random.Random) -> str:
+    return random_day(rng)[:7]
+
+
+async def register(http, rng: random.Random) -> Session:
+    email = f"load_{uuid.uuid4().hex[:12]}@example.com"
+    response = await http.post("/api/auth/register", json={"name": "Load", "email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return Session(email, response.json()["token"])
+
+
+async def seed(http, users: int, expenses: int, rng: random.Random) -> List[Session]:
+    """Register ``users`` users and import ``expenses`` expenses for each through the API."""
+    sessions = await asyncio.gather(*(register(http, rng) for _ in range(users)))
+    for session in sessions:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=["amount", "category", "description", "date"])
+        writer.writeheader()
+        for _ in range(expenses):
+            writer.writerow(random_expense(rng))
+        response = await http.post(
+            "/api/expenses/import", headers=session.headers,
+            files={"file": ("seed.csv", buffer.getvalue().encode("utf-8"), "text/csv")}
+        )
+        response.raise_for_status()
+        page = await http.get("/api/expenses", headers=session.headers, params={"limit": 200})
+        session.expense_ids = [expense["id"] for expense in page.json()]
+    return sessions
+
+
+async def run_request(http, route: str, session: Session, rng: random.Random) -> httpx.Response:
+    """Issue one request of the given route for ``session``."""
+    headers = session.headers
+    expense_id = rng.choice(session.expense_ids) if session.expense_ids else str(uuid.uuid4())
+    if route == "GET /api/expenses":
+        return await http.get("/api/expenses", headers=headers, params={"limit": 50})
+    if route == "GET /api/expenses?search":
+        return await http.get("/api/expenses", headers=headers, params={"limit": 50, "search": "uber"})
+    if route == "GET /api/expenses/{id}":
+        return await http.get(f"/api/expenses/{expense_id}", headers=headers)
+    if route == "POST /api/expenses":
+        response = await http.post("/api/expenses", headers=headers, json=random_expense(rng))
+        if response.status_code == 200:
+            session.expense_ids.append(response.json()["id"])
+        return response
+    if route == "PUT /api/expenses/{id}":
+        return await http.put(f"/api/expenses/{expense_id}", headers=headers,
+                              json={"amount": round(rng.uniform(10, 5000), 2)})
+    if route == "DELETE /api/expenses/{id}":
+        if expense_id in session.expense_ids:
+            session.expense_ids.remove(expense_id)
+        return await http.delete(f"/api/expenses/{expense_id}", headers=headers)
+    if route == "GET /api/expenses/summary/monthly":
+        return await http.get("/api/expenses/summary/monthly", headers=headers, params={"month": random_month(rng)})
+    if route == "GET /api/expenses/summary/range":
+        return await http.get("/api/expenses/summary/range", headers=headers, params={
+            "start_date": FIRST_DAY.isoformat(), "end_date": (FIRST_DAY + timedelta(days=364)).isoformat()
+        })
+    if route == "GET /api/expenses/suggestions":
+        return await http.get("/api/expenses/suggestions", headers=headers, params={"q": rng.choice("usacrp")})
+    if route == "GET /api/expenses/export/excel":
+        return await http.get("/api/expenses/export/excel", headers=headers, params={"month": random_month(rng)})
+    if route == "GET /api/expenses/export/pdf":
+        return await http.get("/api/expenses/export/pdf", headers=headers, params={"month": random_month(rng)})
+    if route == "POST /api/auth/login":
+        return await http.post("/api/auth/login", json={"email": session.email, "password": PASSWORD})
+    if route == "POST /api/auth/register":
+        return await http.post("/api/auth/register", json={
+            "name": "Load", "email": f"load_{uuid.uuid4().hex[:12]}@example.com", "password": PASSWORD
+        })
+    if route == "GET /api/auth/me":
+        return await http.get("/api/auth/me", headers=headers)
+    raise ValueError(route)
+
+
+async def virtual_user(http, sessions, samples, errors, stop_at: float, record_after: float, seed_value: int):
+    """Closed-loop client: one request at a time until ``stop_at``."""
+    rng = random.Random(seed_value)
+    routes, weights = list(MIX), list(MIX.values())
+    while time.perf_counter() < stop_at:
+        route = rng.choices(routes, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await run_request(http, route, rng.choice(sessions), rng)
+            failed = response.status_code >= 500 or response.status_code in (401, 403)
+        except httpx.HTTPError:
+            failed = True
+        if start >= record_after:
+            samples.setdefault(route, []).append(time.perf_counter() - start)
+            errors[route] = errors.get(route, 0) + failed
+
+
+def report(samples: Dict[str, List[float]], errors: Dict[str, int], seconds: float, config: dict) -> dict:
+    routes = {}
+    for route in sorted(samples):
+        routes[route] = {
+            **summarize(samples[route]),
+            "rps": round(len(samples[route]) / seconds, 2),
+            "errors": errors.get(route, 0),
+        }
+    total = sum(len(s) for s in samples.values())
+    return {
+        "config": config,
+        "commit": git_commit(),
+        "measured_s": round(seconds, 2),
+        "total": {"requests": total, "rps": round(total / seconds, 2), "errors": sum(errors.values())},
+        "routes": routes,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def start_server(port: int, workers: int, launcher: str = "uvicorn") -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MONGO_URL": BENCH_MONGO_URL,
+        "DB_NAME": BENCH_DB_NAME,
+        "EXPORT_CACHE_DIR": tempfile.mkdtemp(prefix="loadtest-exports-"),
+    }
+    if launcher == "gunicorn":
+        # The production launcher (gunicorn.conf.py); CLI flags override it
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app",
+                   "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--workers", str(workers),
+                   "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+
+async def wait_until_healthy(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=2) as http:
+        while True:
+            try:
+                if (await http.get("/api/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"server at {base_url} did not become healthy")
+            await asyncio.sleep(0.2)
+
+
+async def run(args) -> dict:
+    mongo = AsyncIOMotorClient(BENCH_MONGO_URL)
+    await mongo.drop_database(BENCH_DB_NAME)
+    mongo.close()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, args.workers, args.launcher)
+    try:
+        await wait_until_healthy(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as http:
+            rng = random.Random(args.seed)
+            sessions = await seed(http, args.users, args.expenses, rng)
+            samples, errors = {}, {}
+            started = time.perf_counter()
+            record_after = started + args.warmup
+            stop_at = record_after + args.duration
+            await asyncio.gather(*(
+                virtual_user(http, sessions, samples, errors, stop_at, record_after, args.seed + i)
+                for i in range(args.concurrency)
+            ))
+            measured = time.perf_counter() - record_after
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    config = {k: getattr(args, k) for k in ("users", "expenses", "concurrency", "duration", "warmup", "workers", "launcher", "seed")}
+    return report(samples, errors, measured, config)
+
+
+def compare(old_path: str, new_path: str) -> dict:
+    """Per-route change in RPS and p95/p99 between two reports."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    diff = {}
+    for route in sorted(set(old["routes"]) | set(new["routes"])):
+        before, after = old["routes"].get(route), new["routes"].get(route)
+        if not before or not after:
+            diff[route] = {"only_in": "new" if after else "old"}
+            continue
+        diff[route] = {
+            key: {"old": before[key], "new": after[key], "change_pct": round((after[key] - before[key]) / before[key] * 100, 1) if before[key] else None}
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        }
+    return {"old": old.get("commit"), "new": new.get("commit"), "routes": diff}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="seeded users")
+    parser.add_argument("--expenses", type=int, default=1000, help="seeded expenses per user")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--launcher", choices=("uvicorn", "gunicorn"), default="uvicorn",
+                        help="start the server with uvicorn --workers or gunicorn.conf.py")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--base-url", help="load an already running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for data and the request mix")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two reports and exit")
+    args = parser.parse_args(argv)
+
+    result = compare(*args.compare) if args.compare else asyncio.run(run(args))
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
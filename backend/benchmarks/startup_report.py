@@ -0,0 +1,131 @@
+"""Cold-start report: import time breakdown and time to first healthy response.
+
+1. Runs ``python -X importtime -c "import server"`` in a fresh interpreter
+   and sums the cumulative import time of each top-level package.
+2. Starts ``uvicorn server:app`` and polls ``/api/health`` until it answers
+   200, timing from process launch.
+
+Exits non-zero if either total exceeds its threshold, or if importing the
+server pulls in a module that should only load on first use (the export
+libraries), so it can run as a CI regression check.
+
+    cd backend && python benchmarks/startup_report.py [--max-import-ms 600] [--max-ready-ms 3000]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from common import BACKEND_DIR, BENCH_DB_NAME, BENCH_MONGO_URL, percentile
+
+# Must not be imported by ``import server``; see exports.py
+LAZY_MODULES = ("openpyxl", "reportlab")
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def server_env() -> dict:
+    return {**os.environ, "MONGO_URL": BENCH_MONGO_URL, "DB_NAME": BENCH_DB_NAME}
+
+
+def import_profile(top: int) -> dict:
+    """Top-level packages by cumulative import time, from one fresh interpreter."""
+    probe = f"import sys, server; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND_DIR, env=server_env(), capture_output=True, text=True, check=True
+    )
+    # -X importtime prints children before their parent, so the modules
+    # server.py imports directly are the depth-1 lines just before "server"
+    direct = []
+    server_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if not indent:
+            if name == "server":
+                server_us = int(cumulative)
+                break
+            direct = []
+        elif len(indent) == 2:
+            direct.append((name, int(cumulative)))
+    packages = defaultdict(int)
+    for name, cumulative in direct:
+        packages[name.split(".")[0]] += cumulative
+    ranked = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return {
+        "server_ms": round(server_us / 1000, 1),
+        "top_packages_ms": {name: round(us / 1000, 1) for name, us in ranked},
+        "eagerly_imported": [m for m in result.stdout.strip().split(",") if m],
+    }
+
+
+def time_to_healthy(port: int, timeout: float) -> float:
+    """Seconds from launching uvicorn until ``/api/health`` returns 200."""
+    url = f"http://127.0.0.1:{port}/api/health"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=server_env()
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with status {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"{url} not healthy after {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="cold starts to measure (the median is checked)")
+    parser.add_argument("--top", type=int, default=15, help="packages to list in the import breakdown")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for a healthy server")
+    parser.add_argument("--max-import-ms", type=float, default=600.0, help="threshold for importing server.py")
+    parser.add_argument("--max-ready-ms", type=float, default=3000.0, help="threshold for the first 200 from /api/health")
+    args = parser.parse_args(argv)
+
+    imports = [import_profile(args.top) for _ in range(args.runs)]
+    ready_ms = [time_to_healthy(args.port, args.timeout) * 1000 for _ in range(args.runs)]
+    import_ms = percentile([run["server_ms"] for run in imports], 50)
+    ready = percentile(ready_ms, 50)
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append(f"import server took {import_ms:.0f}ms (max {args.max_import_ms:.0f}ms)")
+    if ready > args.max_ready_ms:
+        failures.append(f"first healthy response after {ready:.0f}ms (max {args.max_ready_ms:.0f}ms)")
+    eager = sorted({m for run in imports for m in run["eagerly_imported"]})
+    if eager:
+        failures.append(f"imported at startup but should load lazily: {', '.join(eager)}")
+
+    print(json.dumps({
+        "runs": args.runs,
+        "import_server_ms": {"median": import_ms, "runs": [run["server_ms"] for run in imports]},
+        "time_to_healthy_ms": {"median": round(ready, 1), "runs": [round(ms, 1) for ms in ready_ms]},
+        "top_packages_ms": imports[-1]["top_packages_ms"],
+        "thresholds_ms": {"import": args.max_import_ms, "ready": args.max_ready_ms},
+        "failures": failures,
+    }, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""In-process cache for rendered monthly summaries.
+
+Each entry is an encoded JSON body together with the data version it was
+built from. Readers ask for the version they expect and anything else is a
+miss, so a backend shared between workers stays correct even when an
+invalidation from another worker has not reached it yet.
+
+``CacheBackend`` is the interface the server uses; ``MemoryCache`` is the
+default, per-process implementation. A shared backend (Redis, memcached)
+only has to store the same pairs under the same keys.
+"""
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+# Rough per-entry cost of the key, tuple and bookkeeping on top of the body
+ENTRY_OVERHEAD_BYTES = 256
+
+
+class CacheBackend(ABC):
+    """Storage for versioned response bodies."""
+
+    @abstractmethod
+    def get(self, key: Hashable, version: int) -> Optional[bytes]:
+        """The body stored under ``key`` if it was built from ``version``."""
+
+    @abstractmethod
+    def set(self, key: Hashable, version: int, body: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        ...
+
+
+class MemoryCache(CacheBackend):
+    """LRU cache bounded by total body size, with an optional TTL.
+
+    Only touched from the event loop thread, so it takes no locks.
+    """
+
+    def __init__(self, max_bytes: int, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[int, bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = self.misses = self.stale = self.evictions = self.expirations = self.invalidations = 0
+
+    @staticmethod
+    def _size(body: bytes) -> int:
+        return len(body) + ENTRY_OVERHEAD_BYTES
+
+    def _drop(self, key: Hashable) -> None:
+        _, body, _ = self._entries.pop(key)
+        self._bytes -= self._size(body)
+
+    def get(self, key: Hashable, version: int) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_version, body, stored_at = entry
+        if stored_version != version:
+            self._drop(key)
+            self.stale += 1
+            self.misses += 1
+            return None
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def set(self, key: Hashable, version: int, body: bytes) -> None:
+        if key in self._entries:
+            self._drop(key)
+        if self._size(body) > self.max_bytes:
+            return
+        self._entries[key] = (version, body, time.monotonic())
+        self._bytes += self._size(body)
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        if key in self._entries:
+            self._drop(key)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
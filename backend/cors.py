@@ -0,0 +1,90 @@
+"""CORS as a single pure-ASGI middleware.
+
+Preflight requests are answered straight from the middleware with a
+``Access-Control-Max-Age`` so browsers cache them; every other response
+gets the CORS headers appended to its ``http.response.start`` message.
+Nothing is buffered, so streamed exports pass through untouched. All
+header values are encoded once, when the app is built.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+ALLOW_METHODS = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def parse_origins(value: Optional[str]) -> List[str]:
+    """Comma-separated ``CORS_ORIGINS`` to a list; empty or unset means ``*``."""
+    origins = [origin.strip().rstrip("/") for origin in (value or "").split(",") if origin.strip()]
+    return origins or ["*"]
+
+
+class CORSMiddleware:
+    """Adds CORS headers to every response and answers preflights.
+
+    With ``allow_origins=["*"]`` any origin is allowed and the headers are
+    identical for every request. With an explicit list the request's
+    ``Origin`` is echoed back when it is listed and no CORS headers are sent
+    otherwise, which the browser treats as a refusal. Every response then
+    carries ``Vary: Origin``, also those to requests without an allowed
+    ``Origin``, so a shared cache never hands one of them to a listed origin.
+    """
+
+    def __init__(self, app, allow_origins: Iterable[str] = ("*",), max_age: int = 86400):
+        self.app = app
+        self.allow_all = "*" in allow_origins
+        self.allow_origins = {origin.encode("latin-1") for origin in allow_origins if origin != "*"}
+        common = [
+            (b"access-control-allow-methods", ALLOW_METHODS.encode("latin-1")),
+            (b"access-control-allow-headers", b"*"),
+        ]
+        self.response_headers: Headers = common + [(b"access-control-expose-headers", b"*")]
+        self.preflight_headers: Headers = common + [
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            (b"content-length", b"0"),
+        ]
+        self.vary_headers: Headers = []
+        if self.allow_all:
+            self.response_headers.append((b"access-control-allow-origin", b"*"))
+            self.preflight_headers.append((b"access-control-allow-origin", b"*"))
+        else:
+            self.vary_headers.append((b"vary", b"Origin"))
+            self.response_headers += self.vary_headers
+            self.preflight_headers += self.vary_headers
+
+    def origin_headers(self, scope) -> Optional[Headers]:
+        """Origin-specific headers for this request, or None if it is not allowed."""
+        if self.allow_all:
+            return []
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                if value.rstrip(b"/") in self.allow_origins:
+                    return [(b"access-control-allow-origin", value)]
+                return None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        extra = self.origin_headers(scope)
+        if scope["method"] == "OPTIONS" and any(name == b"access-control-request-method" for name, _ in scope["headers"]):
+            if extra is None:
+                headers = [(b"content-length", b"0")] + self.vary_headers
+            else:
+                headers = self.preflight_headers + extra
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        cors_headers = self.response_headers + extra if extra is not None else self.vary_headers
+        if not cors_headers:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
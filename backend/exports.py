@@ -0,0 +1,333 @@
+"""Report rendering and caching for the expense export routes.
+
+Renderers are synchronous and CPU bound; the server runs them off the event
+loop and streams their output as it is produced. Finished reports are kept
+on disk by ``ExportCache`` so an unchanged month is rendered only once.
+
+openpyxl and ReportLab are imported on first use rather than with this
+module: together they account for most of the server's import time and
+only the export routes need them.
+"""
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from metrics import EXPORT_RENDER_SECONDS
+
+logger = logging.getLogger(__name__)
+
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXCEL_HEADERS = ['Date', 'Category', 'Description', 'Amount (₹)']
+PDF_MEDIA_TYPE = "application/pdf"
+PDF_HEADERS = ['Date', 'Category', 'Description', 'Amount (₹)']
+# Fixed widths (summing to letter's frame width) spare ReportLab from
+# measuring every cell to size the columns
+PDF_COL_WIDTHS = [80, 110, 188, 90]
+# Rows per LongTable; splitting one huge table page by page is quadratic
+PDF_TABLE_CHUNK_ROWS = 300
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', '1'))
+
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_QUEUE_CHUNKS = 8
+
+
+class ExportCancelled(Exception):
+    """Raised inside a render thread when the client stopped reading."""
+
+
+class _QueueWriter:
+    """Write-only file object handing fixed-size chunks to an asyncio queue.
+
+    ``write`` blocks the render thread while the queue is full, so a slow
+    client throttles rendering instead of letting output pile up in memory.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self._loop = loop
+        self._queue = queue
+        self._buffer = bytearray()
+        self.cancelled = threading.Event()
+
+    def _put(self, item) -> None:
+        if self.cancelled.is_set():
+            raise ExportCancelled()
+        asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop).result()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= STREAM_CHUNK_SIZE:
+            self._put(bytes(self._buffer[:STREAM_CHUNK_SIZE]))
+            del self._buffer[:STREAM_CHUNK_SIZE]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def finish(self, error: BaseException = None) -> None:
+        if self._buffer and error is None:
+            self._put(bytes(self._buffer))
+        self._buffer.clear()
+        self._put(error)
+
+
+async def stream_from_thread(render: Callable[[Any], None]) -> AsyncIterator[bytes]:
+    """Run ``render(fileobj)`` on a worker thread and yield what it writes."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+    writer = _QueueWriter(loop, queue)
+
+    def run():
+        error = None
+        try:
+            render(writer)
+        except ExportCancelled:
+            return
+        except BaseException as exc:  # re-raised by the consuming generator
+            error = exc
+        try:
+            writer.finish(error)
+        except ExportCancelled:
+            pass
+
+    thread = threading.Thread(target=run, name="export-stream", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Unblock the render thread if the client went away mid-stream
+        writer.cancelled.set()
+        while not queue.empty():
+            queue.get_nowait()
+
+
+def import_excel_renderer() -> None:
+    """Import openpyxl ahead of the first Excel export."""
+    import openpyxl.cell  # noqa: F401
+    import openpyxl.styles  # noqa: F401
+
+
+def excel_workbook():
+    """A write-only workbook with the styled header row already in place."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Expenses")
+    header = []
+    for title in EXCEL_HEADERS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="6366F1", end_color="6366F1", fill_type="solid")
+        header.append(cell)
+    ws.append(header)
+    return wb, ws
+
+
+def append_excel_rows(ws, expenses: Iterable[Dict[str, Any]]) -> float:
+    """Append expense rows; returns their summed amount."""
+    total = 0
+    for exp in expenses:
+        ws.append([exp['date'], exp['category'], exp['description'], exp['amount']])
+        total += exp['amount']
+    return total
+
+
+def finish_excel(ws, total: float) -> None:
+    ws.append([])
+    ws.append(['Total', '', '', total])
+
+
+async def stream_excel(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """Stream an .xlsx report built from batches of expenses.
+
+    Rows go to openpyxl's write-only sheet (spooled to a temp file, so memory
+    stays flat), then the zip container is compressed and streamed out chunk
+    by chunk while it is being written.
+    """
+    start = time.perf_counter()
+    wb, ws = excel_workbook()
+    total = 0
+    async for batch in batches:
+        total += await asyncio.to_thread(append_excel_rows, ws, batch)
+    finish_excel(ws, total)
+    async for chunk in stream_from_thread(wb.save):
+        yield chunk
+    EXPORT_RENDER_SECONDS.labels("excel").observe(time.perf_counter() - start)
+
+
+PdfRow = Tuple[str, str, str, float]
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+
+
+@lru_cache(maxsize=None)
+def pdf_styles():
+    """Paragraph and table styles, built once per process."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    return styles['Title'], styles['Heading2'], table_style
+
+
+def pdf_row(exp: Dict[str, Any]) -> PdfRow:
+    """The fields of an expense the PDF needs (cheap to send to a worker)."""
+    return exp['date'], exp['category'], exp['description'][:30], exp['amount']
+
+
+def render_pdf(month: str, rows: Sequence[PdfRow]) -> bytes:
+    """Render the monthly PDF report.
+
+    The table is laid out as LongTables of ``PDF_TABLE_CHUNK_ROWS`` rows with
+    fixed column widths; each repeats the header row on every page it spans.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer
+
+    title_style, heading_style, table_style = pdf_styles()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    total = sum(row[3] for row in rows)
+    elements = [
+        Paragraph(f"<b>Expense Report - {month}</b>", title_style),
+        Spacer(1, 20),
+        Paragraph(f"<b>Total Expenses: ₹{total:,.2f}</b>", heading_style),
+        Spacer(1, 20),
+    ]
+    for start in range(0, max(len(rows), 1), PDF_TABLE_CHUNK_ROWS):
+        table_data = [PDF_HEADERS] + [
+            [date, category, description, f"₹{amount:,.2f}"]
+            for date, category, description, amount in rows[start:start + PDF_TABLE_CHUNK_ROWS]
+        ]
+        table = LongTable(table_data, colWidths=PDF_COL_WIDTHS, repeatRows=1)
+        table.setStyle(table_style)
+        elements.append(table)
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def pdf_executor() -> ProcessPoolExecutor:
+    """Process pool for PDF rendering, started on first use.
+
+    Workers are spawned rather than forked so they never inherit the server's
+    Mongo client or event loop.
+    """
+    global _pdf_executor
+    if _pdf_executor is None:
+        _pdf_executor = ProcessPoolExecutor(
+            max_workers=PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pdf_executor
+
+
+async def render_pdf_in_pool(month: str, rows: Sequence[PdfRow]) -> bytes:
+    with EXPORT_RENDER_SECONDS.labels("pdf").time():
+        return await asyncio.get_running_loop().run_in_executor(pdf_executor(), render_pdf, month, rows)
+
+
+def shutdown_executors() -> None:
+    global _pdf_executor
+    if _pdf_executor is not None:
+        _pdf_executor.shutdown(wait=False, cancel_futures=True)
+        _pdf_executor = None
+
+
+EXPORT_FORMATS = {
+    "pdf": (".pdf", PDF_MEDIA_TYPE),
+    "excel": (".xlsx", EXCEL_MEDIA_TYPE),
+}
+
+
+class ExportCache:
+    """Finished export files on disk, bounded by total size with LRU eviction.
+
+    A file's name is derived from ``(user_id, month, format, data version)``,
+    so any worker sharing the directory can find it without an index, and a
+    file for an older data version is simply never looked up again. Recency
+    is tracked through the file's mtime.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _month_prefix(user_id: str, month: str) -> str:
+        return hashlib.sha256(f"{user_id}:{month}".encode("utf-8")).hexdigest()[:32]
+
+    def path_for(self, user_id: str, month: str, fmt: str, version: int) -> Path:
+        extension = EXPORT_FORMATS[fmt][0]
+        return self.directory / f"{self._month_prefix(user_id, month)}-{fmt}-{version}{extension}"
+
+    def get(self, user_id: str, month: str, fmt: str, version: int) -> Optional[Path]:
+        path = self.path_for(user_id, month, fmt, version)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, user_id: str, month: str, fmt: str, version: int, data: bytes) -> Path:
+        """Store a rendered file atomically and evict old entries over budget."""
+        path = self.path_for(user_id, month, fmt, version)
+        tmp = self.temp_path(path)
+        tmp.write_bytes(data)
+        return self.commit(tmp, path)
+
+    @staticmethod
+    def temp_path(path: Path) -> Path:
+        """Where to write ``path`` before ``commit``; ignored by eviction and lookups."""
+        return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+    def commit(self, tmp: Path, path: Path) -> Path:
+        """Move a fully written temp file into place and evict over budget."""
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.directory.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        used = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if used <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            used -= size
@@ -0,0 +1,86 @@
+"""Gunicorn settings for running the API with several Uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py server:app
+
+Each worker imports the app after the fork (no ``preload_app``), so its
+Mongo client, thread pools and caches are created in that worker by the
+app's lifespan handler. Every setting can be overridden from the
+environment:
+
+* ``WEB_CONCURRENCY``: worker processes (default: one per available CPU,
+  counting a container's CPU quota)
+* ``MAX_REQUESTS`` / ``MAX_REQUESTS_JITTER``: recycle a worker after this
+  many requests, plus up to the jitter, so memory growth stays bounded and
+  workers don't all restart at once (0 disables)
+* ``GRACEFUL_TIMEOUT``: seconds a worker gets to finish in-flight requests
+  and export jobs after SIGTERM before it is killed
+* ``PROMETHEUS_MULTIPROC_DIR``: where workers write their metric samples; a
+  temporary directory is used if unset
+"""
+import math
+import os
+import shutil
+import tempfile
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring a container's cgroup CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY") or available_cpus())
+preload_app = False
+
+max_requests = int(os.environ.get("MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", "500"))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+# Workers heartbeat from the event loop, so this only catches a blocked loop
+timeout = int(os.environ.get("WORKER_TIMEOUT", "120"))
+keepalive = 5
+
+accesslog = None
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info")
+
+_created_metrics_dir = None
+
+
+def on_starting(server):
+    """Give the workers an empty, shared directory for Prometheus samples."""
+    global _created_metrics_dir
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        # Samples left by a previous run would be merged into this one's
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".db"):
+                os.remove(os.path.join(directory, name))
+    else:
+        directory = _created_metrics_dir = tempfile.mkdtemp(prefix="vividexpense-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    server.log.info("Prometheus multiprocess directory: %s", directory)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges (requests in flight, pool checkouts)."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if _created_metrics_dir:
+        shutil.rmtree(_created_metrics_dir, ignore_errors=True)
@@ -0,0 +1,99 @@
+"""MongoDB index declarations and query-plan verification.
+
+``INDEXES`` lists every index the API's query shapes rely on. The server
+creates them at startup with ``ensure_indexes``; ``manage.py check-indexes``
+runs ``explain()`` on each route's query shape and fails if any of them
+would fall back to a collection scan.
+"""
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "expenses": [
+        # get_expenses (keyset on date, id), monthly summary and exports
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)],
+                   name="user_date_id"),
+        # get_expenses filtered by category
+        IndexModel([("user_id", ASCENDING), ("category", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)],
+                   name="user_category_date_id"),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # get_expenses?search= (a $text query must match user_id exactly)
+        IndexModel([("user_id", ASCENDING), ("description", TEXT)], name="user_description_text"),
+    ],
+    "monthly_rollups": [
+        IndexModel([("user_id", ASCENDING), ("month", ASCENDING)], name="user_month_unique", unique=True),
+    ],
+    "export_jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Job records are only needed while a client polls for them
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=24 * 3600),
+    ],
+    "suggestions": [
+        # Prefix lookups scan value_lower under one user, with or without kind
+        IndexModel([("user_id", ASCENDING), ("value_lower", ASCENDING), ("kind", ASCENDING)],
+                   name="user_value_kind_unique", unique=True),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+}
+
+
+async def ensure_indexes(db) -> None:
+    """Create any missing index from ``INDEXES``; existing ones are left alone."""
+    for collection, models in INDEXES.items():
+        try:
+            created = await db[collection].create_indexes(models)
+            logger.info("Indexes on %s: %s", collection, ", ".join(created))
+        except OperationFailure as exc:
+            # Typically duplicate data blocking a unique index; serve anyway
+            # and let check-indexes surface the problem
+            logger.error("Could not create indexes on %s: %s", collection, exc)
+
+
+def find_collscans(plan: Any) -> List[str]:
+    """Return the path of every COLLSCAN stage found in an explain document."""
+    found = []
+
+    def walk(node, path):
+        if isinstance(node, dict):
+            if node.get("stage") == "COLLSCAN":
+                found.append(path or "/")
+            for key, value in node.items():
+                walk(value, f"{path}/{key}")
+        elif isinstance(node, list):
+            for i, value in enumerate(node):
+                walk(value, f"{path}[{i}]")
+
+    walk(plan, "")
+    return found
+
+
+async def explain_shape(db, shape: Dict[str, Any]) -> Dict[str, Any]:
+    """Explain a ``find`` or ``aggregate`` query shape."""
+    collection = db[shape["collection"]]
+    if "pipeline" in shape:
+        return await db.command("aggregate", shape["collection"], pipeline=shape["pipeline"], explain=True)
+    cursor = collection.find(shape["filter"])
+    if shape.get("sort"):
+        cursor = cursor.sort(shape["sort"])
+    if shape.get("limit"):
+        cursor = cursor.limit(shape["limit"])
+    return await cursor.explain()
+
+
+async def check_query_plans(db, shapes: Dict[str, Dict[str, Any]]) -> List[Tuple[str, List[str]]]:
+    """Explain every shape and return ``(name, collscan_paths)`` for the failing ones."""
+    failures = []
+    for name, shape in shapes.items():
+        plan = await explain_shape(db, shape)
+        scans = find_collscans(plan)
+        if scans:
+            failures.append((name, scans))
+    return failures
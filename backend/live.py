@@ -0,0 +1,128 @@
+"""Per-user live update streams (Server-Sent Events).
+
+``Broker`` is an in-process publish/subscribe hub keyed by user id. Each
+open stream is a ``Subscription`` with a bounded queue: when a client reads
+too slowly for its queue, the pending events are dropped and replaced by a
+single ``resync`` event telling it to refetch, so a stalled connection never
+holds more than ``queue_size`` events. ``sse_stream`` turns a subscription
+into the SSE wire format with periodic heartbeats.
+
+What gets published (and from which worker) is up to the server; the broker
+only delivers to streams open in this process.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+RESYNC = {"type": "resync"}
+
+
+class TooManyStreams(Exception):
+    """The user already has the maximum number of open streams."""
+
+
+class Subscription:
+    def __init__(self, broker: "Broker", user_id: str, queue_size: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def put(self, event: Optional[Dict[str, Any]]) -> None:
+        """Queue ``event`` without blocking; a full queue collapses into a resync."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC if event is not None else None)
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Fan-out of events to the open streams of each user."""
+
+    def __init__(self, max_streams_per_user: int = 5, queue_size: int = 32):
+        self.max_streams_per_user = max_streams_per_user
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.resyncs = 0
+        self.closed = False
+
+    def subscribe(self, user_id: str) -> Subscription:
+        streams = self._subscriptions.setdefault(user_id, set())
+        if len(streams) >= self.max_streams_per_user:
+            raise TooManyStreams(user_id)
+        subscription = Subscription(self, user_id, self.queue_size)
+        streams.add(subscription)
+        if self.closed:
+            subscription.put(None)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        streams = self._subscriptions.get(subscription.user_id)
+        if streams is None:
+            return
+        streams.discard(subscription)
+        if not streams:
+            del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self, user_id: str) -> bool:
+        return user_id in self._subscriptions
+
+    def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        for subscription in self._subscriptions.get(user_id, ()):
+            dropped = subscription.dropped
+            subscription.put(event)
+            self.resyncs += subscription.dropped != dropped
+            self.published += 1
+
+    def close(self) -> None:
+        """End every open stream, and any opened later (on shutdown)."""
+        self.closed = True
+        for streams in list(self._subscriptions.values()):
+            for subscription in list(streams):
+                subscription.put(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "users": len(self._subscriptions),
+            "streams": sum(len(streams) for streams in self._subscriptions.values()),
+            "published": self.published,
+            "resyncs": self.resyncs,
+        }
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+async def sse_stream(subscription: Subscription, heartbeat: float, retry_ms: int, max_seconds: float) -> AsyncIterator[bytes]:
+    """SSE frames for ``subscription`` until it is closed or ``max_seconds`` pass.
+
+    A comment line is sent after ``heartbeat`` idle seconds so proxies keep
+    the connection open and dead clients are noticed. Streams end after
+    ``max_seconds``; EventSource reconnects on its own after ``retry_ms``.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+    try:
+        yield f"retry: {retry_ms}\n\n".encode("utf-8")
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if event is None:
+                return
+            yield sse_event(event.get("type", "message"), event)
+    finally:
+        subscription.close()
@@ -0,0 +1,282 @@
+"""Maintenance commands for the VividExpense backend.
+
+    python manage.py ensure-indexes
+    python manage.py check-indexes
+    python manage.py rebuild-rollups [--user USER_ID] [--dry-run]
+    python manage.py migrate-schema [--batch-size N] [--pause SECONDS] [--restart]
+    python manage.py rebuild-suggestions [--user USER_ID]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+import server
+from pymongo import UpdateOne
+
+from indexes import check_query_plans, ensure_indexes
+
+
+def route_query_shapes() -> dict:
+    """The query shapes issued by server.py's routes, with placeholder values."""
+    user_id = "check-indexes"
+    start_date, next_month = server.month_range("2024-03")
+    page_sort = [("date", -1), ("id", -1)]
+    return {
+        "get_expenses": {
+            "collection": "expenses", "filter": {"user_id": user_id},
+            "sort": page_sort, "limit": server.EXPENSES_PAGE_MAX + 1,
+        },
+        "get_expenses[category,range]": {
+            "collection": "expenses",
+            "filter": {"user_id": user_id, "category": "Food", **server.date_filter(gte=start_date, lte=next_month)},
+            "sort": page_sort, "limit": server.EXPENSES_PAGE_MAX + 1,
+        },
+        "get_expenses[search,range]": {
+            "collection": "expenses",
+            "filter": {"user_id": user_id, "$text": {"$search": "uber"},
+                       **server.date_filter(gte=start_date, lte=next_month)},
+            "sort": page_sort, "limit": server.EXPENSES_PAGE_MAX + 1,
+        },
+        "get_expenses[cursor]": {
+            "collection": "expenses",
+            "filter": {"user_id": user_id, **server.keyset_filter(server.parse_expense_date(start_date), "z")},
+            "sort": page_sort, "limit": server.EXPENSES_PAGE_MAX + 1,
+        },
+        "get_expense/delete_expense": {
+            "collection": "expenses", "filter": {"id": "x", "user_id": user_id},
+        },
+        "get_monthly_summary": {
+            "collection": "expenses",
+            "pipeline": server.monthly_summary_pipeline(user_id, start_date, next_month),
+        },
+        "get_range_analytics": {
+            "collection": "expenses",
+            "pipeline": server.range_analytics_pipeline(
+                user_id, server.parse_expense_date("2023-03-01"), server.parse_expense_date("2024-03-01"),
+                server.parse_expense_date("2025-02-28"), "month"
+            ),
+        },
+        "export_pdf/export_excel": {
+            "collection": "expenses",
+            "filter": {"user_id": user_id, **server.date_filter(gte=start_date, lt=next_month)},
+            "sort": [("date", 1)],
+        },
+        "get_suggestions": {
+            "collection": "suggestions",
+            "filter": {"user_id": user_id, "value_lower": {"$regex": "^ub"}},
+            "sort": [("count", -1), ("value_lower", 1)], "limit": 10,
+        },
+        "get_suggestions[kind]": {
+            "collection": "suggestions",
+            "filter": {"user_id": user_id, "value_lower": {"$regex": "^ub"}, "kind": "description"},
+            "sort": [("count", -1), ("value_lower", 1)], "limit": 10,
+        },
+        "monthly rollup": {"collection": "monthly_rollups", "filter": {"user_id": user_id, "month": "2024-03"}},
+        "export jobs": {"collection": "export_jobs", "filter": {"id": "x", "user_id": user_id}},
+        "login/register": {"collection": "users", "filter": {"email": "check@example.com"}},
+        "get_me": {"collection": "users", "filter": {"id": user_id}},
+    }
+
+
+async def cmd_ensure_indexes(args) -> int:
+    await ensure_indexes(server.db)
+    return 0
+
+
+async def cmd_check_indexes(args) -> int:
+    await ensure_indexes(server.db)
+    failures = await check_query_plans(server.db, route_query_shapes())
+    for name, scans in failures:
+        print(f"COLLSCAN in {name}: {', '.join(scans)}")
+    if not failures:
+        print("All route query shapes are index-backed.")
+    return 1 if failures else 0
+
+
+async def expected_rollups(db, user_id=None) -> dict:
+    """Recompute every monthly rollup from the raw expenses."""
+    match = {"user_id": user_id} if user_id else {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "date": server.DATE_STRING_EXPR, "category": "$category"},
+            "amount": {"$sum": server.AMOUNT_PAISE_EXPR},
+            "count": {"$sum": 1}
+        }}
+    ]
+    rollups = {}
+    async for row in db.expenses.aggregate(pipeline, allowDiskUse=True):
+        key = row["_id"]
+        amount, count = int(row["amount"]), row["count"]
+        rollup = rollups.setdefault((key["user_id"], key["date"][:7]), server.empty_rollup())
+        server.add_rollup_sums(rollup, key["date"], key["category"], amount, count)
+    return rollups
+
+
+def normalize_rollup(doc: dict) -> dict:
+    """Comparable view of a stored rollup: aggregates only, empty buckets dropped."""
+    def buckets(field):
+        return {
+            key: {"amount": sums.get("amount", 0), "count": sums.get("count", 0)}
+            for key, sums in doc.get(field, {}).items()
+            if sums.get("count", 0) or sums.get("amount", 0)
+        }
+    return {
+        "total": doc.get("total", 0), "count": doc.get("count", 0),
+        "categories": buckets("categories"), "days": buckets("days"),
+    }
+
+
+async def cmd_rebuild_rollups(args) -> int:
+    """Recompute rollups from raw expenses, report drift and (unless --dry-run) fix it.
+
+    Writes racing with the rebuild can still leave drift behind; run it at a
+    quiet time and re-run with --dry-run to confirm. Also clears in-flight
+    write counters left raised by a worker that died mid-write, which would
+    otherwise keep rollups for those users from being seeded.
+    """
+    db = server.db
+    expected = await expected_rollups(db, args.user)
+    empty = server.empty_rollup()
+    drifted = {}
+
+    stored_filter = {"user_id": args.user} if args.user else {}
+    async for doc in db.monthly_rollups.find(stored_filter, {"_id": 0}):
+        key = (doc["user_id"], doc["month"])
+        want = expected.pop(key, empty)
+        if normalize_rollup(doc) != want or not doc.get("complete"):
+            drifted[key] = want
+    # Months with expenses but no rollup document at all
+    drifted.update(expected)
+
+    for (user_id, month), want in sorted(drifted.items()):
+        print(f"drift: user={user_id} month={month} expected total={want['total']} count={want['count']}")
+    print(f"{len(drifted)} rollup(s) drifted")
+
+    if drifted and not args.dry_run:
+        await db.monthly_rollups.bulk_write([
+            UpdateOne({"user_id": user_id, "month": month}, {"$set": {**want, "complete": True}, "$inc": {"version": 1}}, upsert=True)
+            for (user_id, month), want in drifted.items()
+        ], ordered=False)
+        print(f"{len(drifted)} rollup(s) rebuilt")
+    if not args.dry_run:
+        user_filter = {"id": args.user} if args.user else {}
+        await db.users.update_many({**user_filter, "writes_in_flight": {"$exists": True, "$ne": 0}}, {"$set": {"writes_in_flight": 0}})
+    return 1 if drifted and args.dry_run else 0
+
+
+MIGRATION_ID = f"expenses_schema_v{server.EXPENSE_SCHEMA_VERSION}"
+
+
+async def cmd_migrate_schema(args) -> int:
+    """Convert expenses to the current storage schema, batch by batch.
+
+    Safe to run while the app is serving: the app reads both schemas, each
+    document is converted only if it has not changed since it was read, and
+    progress is checkpointed in the ``migrations`` collection so an
+    interrupted run resumes where it stopped.
+    """
+    db = server.db
+    progress = {} if args.restart else (await db.migrations.find_one({"_id": MIGRATION_ID}) or {})
+    last_id = progress.get("last_id")
+    migrated, skipped, invalid = 0, 0, 0
+    fields = {"_id": 1, "amount": 1, "date": 1, "created_at": 1, "schema_version": 1}
+
+    while True:
+        batch_filter = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await db.expenses.find(batch_filter, fields).sort("_id", 1).limit(args.batch_size).to_list(args.batch_size)
+        if not batch:
+            break
+        operations = []
+        for doc in batch:
+            if doc.get("schema_version") == server.EXPENSE_SCHEMA_VERSION:
+                continue
+            try:
+                changes = server.upgrade_expense_fields(doc)
+            except (KeyError, TypeError, ValueError):
+                invalid += 1
+                continue
+            # Only convert what we read; a concurrent app write wins and the
+            # document is picked up again by a later --restart run
+            guard = {"_id": doc["_id"], **{k: doc.get(k) for k in ("amount", "date", "created_at")}}
+            operations.append(UpdateOne(guard, {"$set": changes}))
+        if operations:
+            result = await db.expenses.bulk_write(operations, ordered=False)
+            migrated += result.modified_count
+            skipped += len(operations) - result.matched_count
+        last_id = batch[-1]["_id"]
+        await db.migrations.update_one({"_id": MIGRATION_ID}, {"$set": {
+            "last_id": last_id, "updated_at": datetime.now(timezone.utc)
+        }}, upsert=True)
+        print(f"migrated={migrated} skipped={skipped} invalid={invalid} last_id={last_id}")
+        if args.pause:
+            await asyncio.sleep(args.pause)
+
+    await db.migrations.update_one({"_id": MIGRATION_ID}, {"$set": {"completed_at": datetime.now(timezone.utc)}}, upsert=True)
+    print(f"Done: {migrated} converted, {skipped} changed concurrently, {invalid} unreadable")
+    if skipped:
+        print("Re-run with --restart to convert the documents that changed during the run.")
+    return 0
+
+
+async def cmd_rebuild_suggestions(args) -> int:
+    """Regenerate the autocomplete suggestions from the raw expenses."""
+    db = server.db
+    match = {"user_id": args.user} if args.user else {}
+    counts = {}
+    for kind in server.SUGGESTION_KINDS:
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": {"user_id": "$user_id", "value": f"${kind}"}, "count": {"$sum": 1}}}
+        ]
+        async for row in db.expenses.aggregate(pipeline, allowDiskUse=True):
+            value = server.suggestion_value(row["_id"].get("value"))
+            if value:
+                # Values differing only in case or spacing share a suggestion
+                entry = counts.setdefault((row["_id"]["user_id"], kind, value.lower()), {"value": value, "count": 0})
+                entry["count"] += row["count"]
+
+    by_user = {}
+    for (user_id, kind, value_lower), entry in counts.items():
+        by_user.setdefault((user_id, kind), []).append({
+            "user_id": user_id, "kind": kind, "value_lower": value_lower, **entry
+        })
+    now = datetime.now(timezone.utc)
+    await db.suggestions.delete_many(match)
+    for docs in by_user.values():
+        docs.sort(key=lambda doc: -doc["count"])
+        await db.suggestions.insert_many(
+            [{**doc, "last_used": now} for doc in docs[:server.SUGGESTIONS_PER_KIND]], ordered=False
+        )
+    print(f"{sum(min(len(docs), server.SUGGESTIONS_PER_KIND) for docs in by_user.values())} suggestion(s) written")
+    return 0
+
+
+COMMANDS = {
+    "ensure-indexes": cmd_ensure_indexes,
+    "check-indexes": cmd_check_indexes,
+    "rebuild-rollups": cmd_rebuild_rollups,
+    "migrate-schema": cmd_migrate_schema,
+    "rebuild-suggestions": cmd_rebuild_suggestions,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--user", help="limit rebuild-rollups/rebuild-suggestions to one user id")
+    parser.add_argument("--dry-run", action="store_true", help="report rollup drift without fixing it")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per migrate-schema batch")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between migration batches")
+    parser.add_argument("--restart", action="store_true", help="ignore the migration checkpoint and start over")
+    args = parser.parse_args(argv)
+    server.connect_mongo()
+    try:
+        return asyncio.run(COMMANDS[args.command](args))
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
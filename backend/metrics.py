@@ -0,0 +1,216 @@
+"""Prometheus metrics for the API, its MongoDB traffic and export rendering.
+
+``MetricsMiddleware`` times every HTTP request by route template,
+``CommandMetrics`` and ``PoolMetrics`` are pymongo listeners registered on
+the Motor client, and ``metrics_response`` renders everything for the
+``/metrics`` endpoint. When ``PROMETHEUS_MULTIPROC_DIR`` is set (several
+worker processes), samples from all workers are aggregated.
+"""
+import os
+import threading
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from pymongo import monitoring
+from starlette.responses import Response
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+EXPORT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Set in the scope of requests the app runs in-process on behalf of another
+# one (the sub-requests of /api/batch); the outer request is already counted
+SUBREQUEST_SCOPE_KEY = "vividexpense.subrequest"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests answered, by route template and status",
+    ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte",
+    ["method", "route"], buckets=REQUEST_BUCKETS
+)
+HTTP_EXCEPTIONS = Counter(
+    "http_request_exceptions_total", "Requests whose handler raised an unhandled exception",
+    ["method", "route"]
+)
+HTTP_SUBREQUESTS = Counter(
+    "http_batch_subrequests_total", "Requests run inside POST /api/batch, by route template and status",
+    ["method", "route", "status"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being handled", multiprocess_mode="livesum"
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round trips, by collection and command",
+    ["collection", "command"], buckets=MONGO_BUCKETS
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error",
+    ["collection", "command"]
+)
+MONGO_POOL_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool",
+    buckets=MONGO_BUCKETS
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total", "Connection check-outs that failed, by reason", ["reason"]
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongodb_pool_checked_out_connections", "Connections currently checked out of the pool",
+    multiprocess_mode="livesum"
+)
+EXPORT_RENDER_SECONDS = Histogram(
+    "export_render_duration_seconds", "Time to render an export, including any wait for a pool worker",
+    ["format"], buckets=EXPORT_BUCKETS
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording count, latency and in-flight HTTP requests.
+
+    Requests are labelled with the matched route's path template (e.g.
+    ``/api/expenses/{expense_id}``) so label cardinality stays bounded.
+    Sub-requests (``SUBREQUEST_SCOPE_KEY``) are only counted in
+    ``http_batch_subrequests_total``, so totals and in-flight requests
+    aren't counted twice.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope.get(SUBREQUEST_SCOPE_KEY):
+            await self.count_subrequest(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            HTTP_EXCEPTIONS.labels(scope["method"], route_label(scope)).inc()
+            raise
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = route_label(scope)
+            HTTP_LATENCY.labels(scope["method"], route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(scope["method"], route, str(status)).inc()
+
+    async def count_subrequest(self, scope, receive, send):
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_SUBREQUESTS.labels(scope["method"], route_label(scope), str(status)).inc()
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command, labelled by collection and command name."""
+
+    def __init__(self):
+        # (request_id, connection_id) -> collection, from started to succeeded/failed
+        self._pending = {}
+
+    def started(self, event):
+        command = event.command
+        target = command.get("collection") if event.command_name == "getMore" else command.get(event.command_name)
+        self._pending[(event.request_id, event.connection_id)] = target if isinstance(target, str) else "-"
+
+    def succeeded(self, event):
+        collection = self._pending.pop((event.request_id, event.connection_id), "-")
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._pending.pop((event.request_id, event.connection_id), "-")
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool check-out wait times and checked-out connections.
+
+    ``checked_out`` and ``waiting`` are also kept as plain counts (summed
+    over all servers) for the readiness check.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.waiting = 0
+
+    def _adjust(self, checked_out: int = 0, waiting: int = 0):
+        with self._lock:
+            self.checked_out += checked_out
+            self.waiting += waiting
+
+    def connection_check_out_started(self, event):
+        self._adjust(waiting=1)
+
+    def connection_checked_out(self, event):
+        self._adjust(checked_out=1, waiting=-1)
+        MONGO_POOL_WAIT.observe(event.duration)
+        MONGO_POOL_CHECKED_OUT.inc()
+
+    def connection_check_out_failed(self, event):
+        self._adjust(waiting=-1)
+        MONGO_POOL_WAIT.observe(event.duration)
+        MONGO_POOL_CHECKOUT_FAILURES.labels(event.reason).inc()
+
+    def connection_checked_in(self, event):
+        self._adjust(checked_out=-1)
+        MONGO_POOL_CHECKED_OUT.dec()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+
+def metrics_response() -> Response:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
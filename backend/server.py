@@ -1,74 +1,233 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, Header, Query, Request, Response, UploadFile, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
-from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from bson.errors import InvalidDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+from indexes import ensure_indexes
+from cache import MemoryCache
+from cors import CORSMiddleware, parse_origins
+from live import Broker, TooManyStreams, sse_stream
+from metrics import SUBREQUEST_SCOPE_KEY, CommandMetrics, MetricsMiddleware, PoolMetrics, metrics_response
+from slow_queries import SlowQueryLog
+from exports import (
+    EXCEL_MEDIA_TYPE, EXPORT_FORMATS, ExportCache, import_excel_renderer, pdf_row, render_pdf_in_pool,
+    shutdown_executors, stream_excel
+)
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError, field_validator
+from typing import List, Literal, Optional, Dict, Any
 import uuid
+import asyncio
+import json
+import base64
+import hashlib
+import secrets
+import csv
+import io
+import re
+import signal
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 import jwt
+import orjson
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Commands slower than SLOW_QUERY_MS are logged with an explain plan and
+# listed by /api/admin/slow-queries (enabled by setting ADMIN_TOKEN)
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.environ.get('SLOW_QUERY_MS', '100')),
+    log_interval=float(os.environ.get('SLOW_QUERY_LOG_INTERVAL_SECONDS', '60'))
+)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# MongoDB connection. Pool limits are explicit so a worker fails fast
+# (and reports not ready) instead of queueing requests behind an exhausted
+# pool or an unreachable server.
+MONGO_POOL_OPTIONS = {
+    "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+    "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+}
+READINESS_PING_TIMEOUT = float(os.environ.get('READINESS_PING_TIMEOUT_MS', '500')) / 1000
+pool_metrics = PoolMetrics()
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Created by connect_mongo() in the app's lifespan (or by manage.py), so
+# importing this module never opens connections or starts monitor threads
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+
+def connect_mongo():
+    """Create the Motor client and make it (and its database) current."""
+    global client, db
+    client = AsyncIOMotorClient(
+        mongo_url, event_listeners=[CommandMetrics(), pool_metrics, slow_query_log], **MONGO_POOL_OPTIONS
+    )
+    db = client[os.environ['DB_NAME']]
+    return db
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-this')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24 * 30  # 30 days
 
+EXPENSES_PAGE_MAX = 1000
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Rendered exports are cached on disk per (user, month, format, data version)
+export_cache = ExportCache(
+    Path(os.environ.get('EXPORT_CACHE_DIR', ROOT_DIR / 'export_cache')),
+    max_bytes=int(os.environ.get('EXPORT_CACHE_MAX_MB', '256')) * 1024 * 1024
+)
+# Encoded monthly summaries, per (user, month) and checked against the rollup version
+summary_cache = MemoryCache(
+    max_bytes=int(os.environ.get('SUMMARY_CACHE_MAX_MB', '32')) * 1024 * 1024,
+    ttl=float(os.environ['SUMMARY_CACHE_TTL_SECONDS']) if os.environ.get('SUMMARY_CACHE_TTL_SECONDS') else None
+)
+EXPORT_JOB_CONCURRENCY = int(os.environ.get('EXPORT_JOB_CONCURRENCY', '2'))
+export_job_slots = asyncio.Semaphore(EXPORT_JOB_CONCURRENCY)
+export_job_tasks = set()
+# On shutdown, running export jobs get this long before they are cancelled
+# (keep it below the server's graceful shutdown timeout)
+EXPORT_JOB_DRAIN_SECONDS = float(os.environ.get('EXPORT_JOB_DRAIN_SECONDS', '20'))
+
+# Live summary updates (GET /api/expenses/summary/stream). Deltas come from
+# the monthly_rollups change stream when MongoDB is a replica set, otherwise
+# from this worker's own writes ("local", only complete with one worker).
+LIVE_UPDATES_SOURCE = os.environ.get('LIVE_UPDATES_SOURCE', 'auto')  # auto, change_stream or local
+LIVE_HEARTBEAT_SECONDS = float(os.environ.get('LIVE_HEARTBEAT_SECONDS', '15'))
+# Streams end on their own well inside gunicorn's GRACEFUL_TIMEOUT, so a
+# shutdown can never be held up by one for longer than that
+LIVE_STREAM_MAX_SECONDS = min(
+    float(os.environ.get('LIVE_STREAM_MAX_SECONDS', '300')),
+    float(os.environ.get('GRACEFUL_TIMEOUT', '30')) / 2
+)
+LIVE_RETRY_MS = 3000
+# Stream tickets are short-lived tokens that can only open a stream, since
+# EventSource can't send an Authorization header and URLs end up in logs
+LIVE_TICKET_TTL_SECONDS = int(os.environ.get('LIVE_TICKET_TTL_SECONDS', '3600'))
+live_broker = Broker(
+    max_streams_per_user=int(os.environ.get('LIVE_MAX_STREAMS_PER_USER', '5')),
+    queue_size=int(os.environ.get('LIVE_QUEUE_SIZE', '32'))
+)
+live_source = "local"
+
+# /api/batch: sub-requests per call, and the request/response headers passed through
+BATCH_MAX_REQUESTS = 20
+# Routes that can't be batched: the batch itself, the stream, and file
+# downloads (which would be rendered in full only to be refused as non-JSON)
+BATCH_EXCLUDED_PATHS = {
+    "/api/batch", "/api/expenses/summary/stream", "/api/expenses/export/pdf", "/api/expenses/export/excel"
+}
+BATCH_EXCLUDED_PATTERN = re.compile(r"/api/expenses/export/jobs/[^/]+/download")
+BATCH_REQUEST_HEADERS = {"if-none-match", "accept"}
+BATCH_RESPONSE_HEADERS = ("etag", "cache-control", "x-next-cursor")
+# Scope key carrying the user a batch already authenticated to its sub-requests
+BATCH_USER_SCOPE_KEY = "vividexpense.batch_user_id"
+
+# bcrypt is deliberately slow; it runs on this pool so it never blocks the event loop
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+password_tasks_in_flight = 0
+
 security = HTTPBearer()
 
-# Create the main app without a prefix
-app = FastAPI()
-
-# CORS: middleware that adds headers to EVERY response (no dependency on Starlette CORS)
-class AddCORSHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        if request.method == "OPTIONS":
-            from starlette.responses import Response
-            return Response(
-                status_code=200,
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS",
-                    "Access-Control-Allow-Headers": "*",
-                    "Access-Control-Max-Age": "86400",
-                },
-            )
-        response = await call_next(request)
-        response.headers["Access-Control-Allow-Origin"] = "*"
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
-        response.headers["Access-Control-Allow-Headers"] = "*"
-        return response
+# Export libraries are imported this many seconds after startup so the
+# first export does not pay for them (negative disables the warm-up)
+EXPORT_WARMUP_DELAY_SECONDS = float(os.environ.get('EXPORT_WARMUP_DELAY_SECONDS', '10'))
 
 
-app.add_middleware(AddCORSHeadersMiddleware)
+async def ensure_indexes_in_background():
+    try:
+        await ensure_indexes(db)
+    except PyMongoError as exc:
+        logger.error("Could not ensure indexes: %s", exc)
+
+
+async def warm_export_libraries():
+    await asyncio.sleep(EXPORT_WARMUP_DELAY_SECONDS)
+    await asyncio.to_thread(import_excel_renderer)
+
+
+def on_shutdown_signal(callback) -> Dict[int, Any]:
+    """Also run ``callback`` on the event loop when SIGTERM or SIGINT arrives.
+
+    The server only runs the lifespan shutdown once every connection has
+    closed, and open summary streams would keep theirs open until
+    LIVE_STREAM_MAX_SECONDS. The server's own handler still runs after
+    ``callback`` is scheduled. Returns the handlers that were replaced.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return {}
+    loop = asyncio.get_running_loop()
+    previous = {}
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        def handler(signum, frame, chained=signal.getsignal(sig)):
+            loop.call_soon_threadsafe(callback)
+            if callable(chained):
+                chained(signum, frame)
+            else:
+                signal.signal(signum, chained)
+                signal.raise_signal(signum)
+        previous[sig] = signal.signal(sig, handler)
+    return previous
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_mongo()
+    slow_query_log.attach(asyncio.get_running_loop(), db)
+    # Index builds are idempotent and usually no-ops; don't hold up the
+    # first request for their round trips
+    background = [asyncio.create_task(ensure_indexes_in_background()), asyncio.create_task(start_live_updates())]
+    if EXPORT_WARMUP_DELAY_SECONDS >= 0:
+        background.append(asyncio.create_task(warm_export_libraries()))
+    replaced_handlers = on_shutdown_signal(live_broker.close)
+    try:
+        yield
+    finally:
+        for sig, handler in replaced_handlers.items():
+            signal.signal(sig, handler)
+        for task in background:
+            task.cancel()
+        live_broker.close()
+        await drain_export_jobs(EXPORT_JOB_DRAIN_SECONDS)
+        client.close()
+        password_executor.shutdown(wait=False)
+        shutdown_executors()
+
+
+# Create the main app without a prefix
+app = FastAPI(lifespan=lifespan)
+
+# CORS_ORIGINS is a comma-separated list of allowed origins ("*" if unset)
 app.add_middleware(
     CORSMiddleware,
-    allow_credentials=False,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"],
+    allow_origins=parse_origins(os.environ.get('CORS_ORIGINS')),
+    max_age=int(os.environ.get('CORS_MAX_AGE_SECONDS', '86400'))
 )
+# Added last so it is outermost and sees every request, CORS preflights included
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    """FastAPI's 422, but with rejected NaN/Infinity inputs echoed as null
+    (the stock handler fails to encode them and turns the 422 into a 500)."""
+    return FastJSONResponse({"detail": jsonable_encoder(exc.errors())}, status_code=422)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -94,18 +253,31 @@ class AuthResponse(BaseModel):
     token: str
     user: User
 
+def check_expense_date(value: Optional[str]) -> Optional[str]:
+    if value is not None:
+        datetime.strptime(value, "%Y-%m-%d")
+    return value
+
+# Amounts are stored as integer paise; keep them finite and small enough
+# that the paise value is exact in a float and fits a BSON int64
+AMOUNT_LIMIT = 1e13
+
 class ExpenseCreate(BaseModel):
-    amount: float
+    amount: float = Field(allow_inf_nan=False, gt=-AMOUNT_LIMIT, lt=AMOUNT_LIMIT)
     category: str
     description: str
     date: str  # YYYY-MM-DD format
 
+    _check_date = field_validator('date')(check_expense_date)
+
 class ExpenseUpdate(BaseModel):
-    amount: Optional[float] = None
+    amount: Optional[float] = Field(None, allow_inf_nan=False, gt=-AMOUNT_LIMIT, lt=AMOUNT_LIMIT)
     category: Optional[str] = None
     description: Optional[str] = None
     date: Optional[str] = None
 
+    _check_date = field_validator('date')(check_expense_date)
+
 class Expense(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str
@@ -123,6 +295,84 @@ class MonthlySummary(BaseModel):
     daily_expenses: List[Dict[str, Any]]
     top_categories: List[Dict[str, Any]]
 
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
+
+class ExportJobCreate(BaseModel):
+    month: str  # YYYY-MM format
+    format: Literal["pdf", "excel"]
+
+class ExportJob(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    month: str
+    format: str
+    status: str  # pending, running, done or failed
+    error: Optional[str] = None
+    created_at: datetime
+
+class AnalyticsBucket(BaseModel):
+    start: str  # first day of the bucket, YYYY-MM-DD
+    total: float
+    count: int
+    change: Optional[float] = None  # vs. the previous bucket
+
+class CategorySeries(BaseModel):
+    category: str
+    amounts: List[float]  # one per bucket
+    total: float
+    previous_total: float
+    change: float
+    change_percentage: Optional[float] = None
+
+class RangeAnalytics(BaseModel):
+    start_date: str
+    end_date: str
+    bucket: str
+    previous_start_date: str
+    previous_end_date: str
+    total: float
+    count: int
+    previous_total: float
+    previous_count: int
+    change: float
+    change_percentage: Optional[float] = None
+    buckets: List[AnalyticsBucket]
+    categories: List[CategorySeries]
+
+class Suggestion(BaseModel):
+    kind: str  # description or category
+    value: str
+    count: int
+
+class StreamTicket(BaseModel):
+    ticket: str
+    expires_in: int
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None  # echoed back to match results to requests
+    method: Literal["GET"] = "GET"
+    path: str  # e.g. "/api/expenses?limit=20"
+    headers: Dict[str, str] = {}
+
+    @field_validator('path')
+    @classmethod
+    def check_path(cls, value: str) -> str:
+        path = value.split("?", 1)[0].rstrip("/")
+        if not path.startswith("/api/") or path in BATCH_EXCLUDED_PATHS or BATCH_EXCLUDED_PATTERN.fullmatch(path):
+            raise ValueError("path must be a JSON /api/ route, not /api/batch, a stream or a file download")
+        return value
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(min_length=1, max_length=BATCH_MAX_REQUESTS)
+
 # Helper functions
 def hash_password(password: str) -> str:
     salt = bcrypt.gensalt()
@@ -131,6 +381,19 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+async def run_password_task(fn, *args):
+    """Run a bcrypt call on the password pool, tracking how many are waiting."""
+    global password_tasks_in_flight
+    password_tasks_in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, fn, *args)
+    finally:
+        password_tasks_in_flight -= 1
+
+def password_queue_depth() -> int:
+    """Password tasks submitted but not yet picked up by a worker thread."""
+    return max(0, password_tasks_in_flight - PASSWORD_HASH_WORKERS)
+
 def create_token(user_id: str) -> str:
     payload = {
         'user_id': user_id,
@@ -138,11 +401,876 @@ def create_token(user_id: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+def create_stream_ticket(user_id: str) -> str:
+    # No 'user_id' claim, so get_current_user rejects it everywhere else
+    payload = {
+        'stream_user_id': user_id,
+        'exp': datetime.now(timezone.utc) + timedelta(seconds=LIVE_TICKET_TTL_SECONDS)
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+def month_range(month: str):
+    """Return the [start, next_month) date strings for a YYYY-MM month.
+
+    Raises ValueError if ``month`` is not a valid YYYY-MM month.
+    """
+    start = datetime.strptime(month, "%Y-%m")
+    end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return f"{start.year:04d}-{start.month:02d}-01", f"{end.year:04d}-{end.month:02d}-01"
+
+def requested_month_range(month: str):
+    """``month_range`` for a month taken from a request; bad input is a 400."""
+    try:
+        return month_range(month)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month, expected YYYY-MM")
+
+# Expense storage schema
+#
+# Version 2 documents store ``date`` as a BSON date (UTC midnight),
+# ``created_at`` as a native datetime and ``amount`` as integer paise.
+# Version 1 documents (ISO strings and float rupees) are still read until
+# `manage.py migrate-schema` has converted them (start.sh runs it before the
+# server starts); each field's format is told apart by its BSON type. Sorts
+# on ``date`` rely on the conversion: BSON orders every date after every
+# string.
+EXPENSE_SCHEMA_VERSION = 2
+
+# Aggregation expressions normalising either format
+AMOUNT_PAISE_EXPR = {"$cond": [
+    {"$eq": [{"$type": "$amount"}, "double"]}, {"$round": [{"$multiply": ["$amount", 100]}, 0]}, "$amount"
+]}
+DATE_STRING_EXPR = {"$cond": [
+    {"$eq": [{"$type": "$date"}, "date"]}, {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}, "$date"
+]}
+DATE_VALUE_EXPR = {"$cond": [
+    {"$eq": [{"$type": "$date"}, "date"]}, "$date",
+    {"$dateFromString": {"dateString": "$date", "format": "%Y-%m-%d", "timezone": "UTC"}}
+]}
+
+def to_paise(amount: float) -> int:
+    return int(round(amount * 100))
+
+def parse_expense_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+def stored_paise(amount) -> int:
+    """Amount of a stored expense in paise, whichever schema it uses."""
+    return amount if isinstance(amount, int) else to_paise(amount)
+
+def stored_date(value) -> str:
+    """Date of a stored expense as YYYY-MM-DD, whichever schema it uses."""
+    return value.date().isoformat() if isinstance(value, datetime) else value
+
+def stored_datetime(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    # Mongo hands back naive UTC datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def expense_document(user_id: str, expense: ExpenseCreate, created_at: datetime) -> Dict[str, Any]:
+    """A new expense in the current storage schema."""
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "amount": to_paise(expense.amount),
+        "category": expense.category,
+        "description": expense.description,
+        "date": parse_expense_date(expense.date),
+        "created_at": created_at,
+        "schema_version": EXPENSE_SCHEMA_VERSION
+    }
+
+def stored_update(update_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert ExpenseUpdate fields to their stored form."""
+    stored = dict(update_data)
+    if 'amount' in stored:
+        stored['amount'] = to_paise(stored['amount'])
+    if 'date' in stored:
+        stored['date'] = parse_expense_date(stored['date'])
+    return stored
+
+def upgrade_expense_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """The $set turning a stored expense into the current schema."""
+    return {
+        "amount": stored_paise(doc['amount']),
+        "date": parse_expense_date(stored_date(doc['date'])),
+        "created_at": stored_datetime(doc['created_at']),
+        "schema_version": EXPENSE_SCHEMA_VERSION
+    }
+
+def expense_from_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """API view of a stored expense (rupee amount, YYYY-MM-DD date)."""
+    expense = {k: v for k, v in doc.items() if k not in ('_id', 'schema_version')}
+    if 'amount' in expense:
+        expense['amount'] = stored_paise(expense['amount']) / 100
+    if 'date' in expense:
+        expense['date'] = stored_date(expense['date'])
+    if 'created_at' in expense:
+        expense['created_at'] = stored_datetime(expense['created_at'])
+    return expense
+
+# Fast JSON responses
+#
+# List and summary routes build plain dicts of the exact response shape and
+# return them in a FastJSONResponse, skipping FastAPI's per-row re-validation
+# through the response_model (which is kept for the OpenAPI schema).
+class FastJSONResponse(Response):
+    """JSON rendered by orjson.
+
+    For the str/int/float/datetime payloads built below the bytes match
+    FastAPI's JSONResponse after Pydantic serialisation: compact separators,
+    raw UTF-8, UTC datetimes with a ``Z`` suffix. (Floats of 1e16 and above
+    would be written ``1e16`` rather than ``1e+16``.)
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return fast_json(content)
+
+def fast_json(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+def expense_json(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """A stored expense as the Expense model would serialise it.
+
+    Keys must stay in Expense's field order for the output to match.
+    """
+    return {
+        "id": doc["id"],
+        "user_id": doc["user_id"],
+        "amount": stored_paise(doc["amount"]) / 100,
+        "category": doc["category"],
+        "description": doc["description"],
+        "date": stored_date(doc["date"]),
+        "created_at": stored_datetime(doc["created_at"]),
+    }
+
+def date_filter(gte: Optional[str] = None, lte: Optional[str] = None, lt: Optional[str] = None) -> Dict[str, Any]:
+    """Query fragment bounding ``date`` (YYYY-MM-DD bounds) across both schemas."""
+    as_string, as_date = {}, {}
+    for op, bound in (("$gte", gte), ("$lte", lte), ("$lt", lt)):
+        if bound is not None:
+            as_string[op] = bound
+            as_date[op] = parse_expense_date(bound)
+    return {"$or": [{"date": as_string}, {"date": as_date}]}
+
+def monthly_summary_pipeline(user_id: str, start_date: str, next_month: str) -> List[Dict[str, Any]]:
+    """Aggregation computing the month's totals, category and daily sums (in paise) in one round trip."""
+    return [
+        {"$match": {"user_id": user_id, **date_filter(gte=start_date, lt=next_month)}},
+        {"$facet": {
+            "totals": [
+                {"$group": {"_id": None, "amount": {"$sum": AMOUNT_PAISE_EXPR}, "count": {"$sum": 1}}}
+            ],
+            "categories": [
+                {"$group": {"_id": "$category", "amount": {"$sum": AMOUNT_PAISE_EXPR}}},
+                {"$sort": {"amount": -1, "_id": 1}}
+            ],
+            "daily": [
+                {"$group": {"_id": DATE_STRING_EXPR, "amount": {"$sum": AMOUNT_PAISE_EXPR}}},
+                {"$sort": {"_id": 1}}
+            ]
+        }}
+    ]
+
+def rollup_key(value: str) -> str:
+    """Escape a category or date so it can be used as a rollup field name."""
+    if value == "":
+        return "%"
+    return value.replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+def rollup_value(key: str) -> str:
+    if key == "%":
+        return ""
+    return key.replace('%2E', '.').replace('%24', '$').replace('%25', '%')
+
+def rollup_increments(expense: Dict[str, Any], sign: int) -> Dict[str, int]:
+    """$inc fields adding (sign=1) or removing (sign=-1) an expense from its month."""
+    paise = sign * stored_paise(expense['amount'])
+    category = f"categories.{rollup_key(expense['category'])}"
+    day = f"days.{rollup_key(stored_date(expense['date']))}"
+    return {
+        "total": paise, "count": sign,
+        f"{category}.amount": paise, f"{category}.count": sign,
+        f"{day}.amount": paise, f"{day}.count": sign,
+    }
+
+def empty_rollup() -> Dict[str, Any]:
+    return {"total": 0, "count": 0, "categories": {}, "days": {}}
+
+def add_rollup_sums(rollup: Dict[str, Any], date: str, category: str, amount: int, count: int) -> None:
+    """Add ``count`` expenses totalling ``amount`` paise on one date and category to ``rollup``."""
+    rollup["total"] += amount
+    rollup["count"] += count
+    for field, value in (("categories", category), ("days", date)):
+        sums = rollup[field].setdefault(rollup_key(value), {"amount": 0, "count": 0})
+        sums["amount"] += amount
+        sums["count"] += count
+
+async def user_write_state(user_id: str) -> tuple:
+    """The user's (in-flight expense writes, data version); see ``expense_write``."""
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "writes_in_flight": 1, "data_version": 1})
+    user = user or {}
+    return user.get('writes_in_flight', 0), user.get('data_version', 0)
+
+@asynccontextmanager
+async def expense_write(user_id: str):
+    """Mark a write to the user's expenses as in flight for its duration.
+
+    An expense is stored before its rollup ``$inc`` lands, so a rollup seed
+    aggregating in between would count it twice. The counter on the user
+    lets ``seed_month_rollup`` see such writes. A worker dying mid-write
+    leaves it raised, which only stops seeding for that user (summaries
+    fall back to aggregating) until ``manage.py rebuild-rollups`` resets it.
+    """
+    await db.users.update_one({"id": user_id}, {"$inc": {"writes_in_flight": 1}})
+    try:
+        yield
+    finally:
+        await db.users.update_one({"id": user_id}, {"$inc": {"writes_in_flight": -1}})
+
+async def seed_month_rollup(user_id: str, month: str, version: Optional[int] = None,
+                            own_writes: int = 0) -> Optional[Dict[str, Any]]:
+    """Recompute a month's rollup from its raw expenses and mark it complete.
+
+    Rollups only count the writes made since they were created, so one
+    created for a month that already held expenses starts out partial and
+    the summary doesn't trust it until this has run. The seed is given up
+    if any of the user's expense writes (other than the caller's own
+    ``own_writes``) was in flight or finished while the expenses were
+    aggregated, since its rollup ``$inc`` may land on top of sums that
+    already count it; the rollup then stays incomplete and the next summary
+    read tries again. Returns the new rollup, or None if it was left alone.
+    """
+    write_state = await user_write_state(user_id)
+    if write_state[0] != own_writes:
+        return None
+    if version is None:
+        version = await month_data_version(user_id, month)
+    start_date, next_month = month_range(month)
+    rollup = empty_rollup()
+    async for row in db.expenses.aggregate([
+        {"$match": {"user_id": user_id, **date_filter(gte=start_date, lt=next_month)}},
+        {"$group": {
+            "_id": {"date": DATE_STRING_EXPR, "category": "$category"},
+            "amount": {"$sum": AMOUNT_PAISE_EXPR}, "count": {"$sum": 1}
+        }}
+    ]):
+        add_rollup_sums(rollup, row['_id']['date'], row['_id']['category'], int(row['amount']), row['count'])
+    result = await db.monthly_rollups.update_one(
+        {"user_id": user_id, "month": month, "version": version},
+        {"$set": {**rollup, "complete": True}, "$inc": {"version": 1}}
+    )
+    if not result.modified_count:
+        return None
+    if await user_write_state(user_id) != write_state:
+        # A write started or finished during the aggregation; take the seed
+        # back (bumping the version so nothing cached from it is served)
+        await db.monthly_rollups.update_one(
+            {"user_id": user_id, "month": month},
+            {"$set": {"complete": False}, "$inc": {"version": 1}}
+        )
+        return None
+    return {**rollup, "version": version + 1}
+
+async def record_expense_change(user_id: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+    """Apply an expense mutation to the monthly rollups.
+
+    ``before``/``after`` are the stored documents on either side of the
+    write (None for create/delete). Every touched month gets its ``version``
+    bumped, even when its sums do not change, and so does the user's
+    ``data_version``.
+    """
+    await record_expense_changes(user_id, [(before, after)])
+
+async def record_expense_changes(user_id: str, changes):
+    """Apply several ``(before, after)`` mutations with one rollup write per month.
+
+    Must run inside the ``expense_write`` block of the write it records.
+    """
+    increments: Dict[str, Dict[str, int]] = {}
+    for before, after in changes:
+        for expense, sign in ((before, -1), (after, 1)):
+            if expense is None:
+                continue
+            month_inc = increments.setdefault(stored_date(expense['date'])[:7], {})
+            for field, value in rollup_increments(expense, sign).items():
+                month_inc[field] = month_inc.get(field, 0) + value
+    if not increments:
+        return
+    operations = [
+        UpdateOne(
+            {"user_id": user_id, "month": month},
+            {"$inc": {**{k: v for k, v in month_inc.items() if v}, "version": 1}},
+            upsert=True
+        )
+        for month, month_inc in increments.items()
+    ]
+    try:
+        result, _, _ = await asyncio.gather(
+            db.monthly_rollups.bulk_write(operations, ordered=False),
+            db.users.update_one({"id": user_id}, {"$inc": {"data_version": 1}}),
+            record_suggestions(user_id, changes)
+        )
+        # A new rollup only holds this write; count in the month's earlier expenses
+        months = list(increments)
+        for index in result.upserted_ids:
+            await seed_month_rollup(user_id, months[index], own_writes=1)
+    except PyMongoError:
+        # The expense write already succeeded; `manage.py rebuild-rollups` repairs the drift
+        logger.exception("Failed to update monthly rollups for user %s", user_id)
+    # Cached exports are keyed by version, so the old ones are never read
+    # again and age out through the export cache's LRU eviction
+    for month in increments:
+        summary_cache.delete((user_id, month))
+    if live_source == "local" and live_broker.has_subscribers(user_id):
+        await publish_local_changes(user_id, increments)
+
+# Search suggestions: a bounded per-user list of the descriptions and
+# categories used so far, counted by use, for prefix autocomplete
+SUGGESTION_KINDS = ("description", "category")
+SUGGESTIONS_PER_KIND = int(os.environ.get('SUGGESTIONS_PER_KIND', '500'))
+SUGGESTION_MAX_LENGTH = 100
+
+def suggestion_value(value: Any) -> str:
+    return " ".join(str(value or "").split())[:SUGGESTION_MAX_LENGTH]
+
+async def record_suggestions(user_id: str, changes):
+    """Count the descriptions and categories that ``changes`` introduce.
+
+    Failures are logged and swallowed: suggestions are a convenience and
+    ``manage.py rebuild-suggestions`` regenerates them.
+    """
+    uses: Dict[tuple, list] = {}
+    for before, after in changes:
+        for kind in SUGGESTION_KINDS:
+            value = suggestion_value(after.get(kind)) if after else ""
+            if not value or (before and suggestion_value(before.get(kind)) == value):
+                continue
+            use = uses.setdefault((kind, value.lower()), [0, value])
+            use[0] += 1
+    if not uses:
+        return
+    now = datetime.now(timezone.utc)
+    try:
+        result = await db.suggestions.bulk_write([
+            UpdateOne(
+                {"user_id": user_id, "value_lower": value_lower, "kind": kind},
+                {"$inc": {"count": count}, "$set": {"value": value, "last_used": now}},
+                upsert=True
+            )
+            for (kind, value_lower), (count, value) in uses.items()
+        ], ordered=False)
+        if result.upserted_count:
+            for kind in {kind for kind, _ in uses}:
+                await prune_suggestions(user_id, kind)
+    except PyMongoError:
+        logger.exception("Failed to update suggestions for user %s", user_id)
+
+async def prune_suggestions(user_id: str, kind: str):
+    """Drop the least used suggestions beyond ``SUGGESTIONS_PER_KIND``."""
+    scope = {"user_id": user_id, "kind": kind}
+    extra = await db.suggestions.count_documents(scope) - SUGGESTIONS_PER_KIND
+    if extra > 0:
+        stale = await db.suggestions.find(scope, {"_id": 1}).sort(
+            [("count", 1), ("last_used", 1)]
+        ).limit(extra).to_list(extra)
+        await db.suggestions.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+async def month_data_version(user_id: str, month: str) -> int:
+    """The month's rollup version; it changes on every write to the month."""
+    rollup = await db.monthly_rollups.find_one({"user_id": user_id, "month": month}, {"_id": 0, "version": 1})
+    return rollup.get('version', 0) if rollup else 0
+
+async def user_data_version(user_id: str) -> int:
+    """The user's data version; it changes on every write to any of their expenses."""
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "data_version": 1})
+    return user.get('data_version', 0) if user else 0
+
+# Conditional GETs: list and summary responses carry an ETag derived from the
+# data version they were read at, and a matching If-None-Match gets a 304
+# before any query runs. Versions are read before the data, so a racing write
+# can only make an ETag too old (one extra refetch), never too new.
+CONDITIONAL_CACHE_CONTROL = "private, no-cache"
+
+def data_etag(user_id: str, version: int, *request_key) -> str:
+    """Strong ETag for a response built from ``user_id``'s data at ``version``.
+
+    The user id is hashed in so a browser that switches accounts never
+    revalidates one user's cached response against another's.
+    """
+    key = json.dumps([user_id, version, *request_key]).encode('utf-8')
+    return f'"{hashlib.blake2b(key, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CONDITIONAL_CACHE_CONTROL})
+
+async def cursor_batches(cursor, size: int = EXPORT_BATCH_SIZE):
+    """Yield a Motor cursor's documents as lists of up to ``size`` rows."""
+    while True:
+        batch = await cursor.to_list(size)
+        if not batch:
+            return
+        yield batch
+
+async def month_expense_batches(user_id: str, month: str):
+    """The month's expenses (API view) in date order, in export-sized batches."""
+    start_date, next_month = month_range(month)
+    cursor = db.expenses.find(
+        {"user_id": user_id, **date_filter(gte=start_date, lt=next_month)},
+        {"_id": 0, "date": 1, "category": 1, "description": 1, "amount": 1}
+    ).sort("date", 1).batch_size(EXPORT_BATCH_SIZE)
+    async for batch in cursor_batches(cursor):
+        yield [expense_from_doc(doc) for doc in batch]
+
+async def render_export(user_id: str, month: str, fmt: str) -> bytes:
+    """Render a complete export file for a user's month."""
+    if fmt == "pdf":
+        rows = []
+        async for batch in month_expense_batches(user_id, month):
+            rows.extend(pdf_row(exp) for exp in batch)
+        # ReportLab layout is CPU bound; render in the worker pool, off the event loop
+        return await render_pdf_in_pool(month, rows)
+    chunks = []
+    async for chunk in stream_excel(month_expense_batches(user_id, month)):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def export_file_response(path: Path, month: str, fmt: str) -> FileResponse:
+    extension, media_type = EXPORT_FORMATS[fmt]
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=expenses_{month}{extension}"}
+    )
+
+async def cache_while_streaming(chunks, user_id: str, month: str, fmt: str, version: int):
+    """Pass ``chunks`` through, writing them to the export cache as they go.
+
+    The file only enters the cache once the stream has completed; a client
+    that disconnects midway leaves nothing behind.
+    """
+    path = export_cache.path_for(user_id, month, fmt, version)
+    tmp = export_cache.temp_path(path)
+    f = await asyncio.to_thread(open, tmp, "wb")
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(f.write, chunk)
+            yield chunk
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(export_cache.commit, tmp, path)
+    finally:
+        if not f.closed:
+            f.close()
+            tmp.unlink(missing_ok=True)
+
+async def run_export_job(job: Dict[str, Any]):
+    try:
+        async with export_job_slots:
+            await db.export_jobs.update_one({"id": job['id']}, {"$set": {"status": "running"}})
+            try:
+                data = await render_export(job['user_id'], job['month'], job['format'])
+                await asyncio.to_thread(export_cache.put, job['user_id'], job['month'], job['format'], job['version'], data)
+            except Exception as exc:
+                logger.exception("Export job %s failed", job['id'])
+                await db.export_jobs.update_one({"id": job['id']}, {"$set": {"status": "failed", "error": str(exc)}})
+                return
+            await db.export_jobs.update_one({"id": job['id']}, {"$set": {"status": "done"}})
+    except asyncio.CancelledError:
+        # The worker is shutting down; don't leave the job "running" forever
+        await db.export_jobs.update_one(
+            {"id": job['id']}, {"$set": {"status": "failed", "error": "Server restarted, submit the export again"}}
+        )
+        raise
+
+async def drain_export_jobs(timeout: float):
+    """Give running export jobs ``timeout`` seconds to finish, then cancel them."""
+    if not export_job_tasks:
+        return
+    _, pending = await asyncio.wait(set(export_job_tasks), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending, timeout=5)
+
+def import_records(upload: UploadFile, fmt: str):
+    """Yield ``(row_number, record)`` from a CSV or NDJSON upload, one row at a time.
+
+    A record that cannot be parsed is yielded as the error message instead.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""))
+        for row_number, row in enumerate(reader, 1):
+            if None in row:
+                # DictReader files surplus fields (e.g. from an unquoted comma) under None
+                yield row_number, f"Expected {len(reader.fieldnames)} fields, got {len(reader.fieldnames) + len(row[None])}"
+                continue
+            yield row_number, row
+        return
+    for row_number, line in enumerate(upload.file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield row_number, f"Invalid JSON: {exc}"
+            continue
+        yield row_number, record if isinstance(record, dict) else "Expected a JSON object"
+
+def next_import_batch(records, user_id: str, created_at: datetime):
+    """Validate up to IMPORT_BATCH_SIZE records into expense documents.
+
+    Returns ``(docs, row_numbers, errors)`` where ``row_numbers[i]`` is the
+    source row of ``docs[i]``; an empty batch means the upload is exhausted.
+    """
+    docs, row_numbers, errors = [], [], []
+    for row_number, record in records:
+        if isinstance(record, str):
+            errors.append((row_number, record))
+        else:
+            try:
+                expense = ExpenseCreate(**record)
+            except ValidationError as exc:
+                errors.append((row_number, "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors()
+                )))
+            except TypeError as exc:
+                # Keys that can't be keyword arguments
+                errors.append((row_number, f"Invalid record: {exc}"))
+            else:
+                try:
+                    doc = expense_document(user_id, expense, created_at)
+                except (ValueError, OverflowError) as exc:
+                    errors.append((row_number, f"Invalid record: {exc}"))
+                else:
+                    docs.append(doc)
+                    row_numbers.append(row_number)
+        if len(docs) + len(errors) >= IMPORT_BATCH_SIZE:
+            break
+    return docs, row_numbers, errors
+
+def build_monthly_summary(total: float, count: int, categories, days) -> Dict[str, Any]:
+    """Shape (category, amount) and (date, amount) pairs into a MonthlySummary dict."""
+    category_breakdown = [
+        {"category": cat, "amount": amt, "percentage": round((amt / total * 100) if total > 0 else 0, 2)}
+        for cat, amt in categories
+    ]
+    category_breakdown.sort(key=lambda x: (-x['amount'], x['category']))
+    daily_expenses = [
+        {"date": date, "amount": amt}
+        for date, amt in sorted(days)
+    ]
+    return {
+        "total_expenses": float(total),
+        "total_count": count,
+        "category_breakdown": category_breakdown,
+        "daily_expenses": daily_expenses,
+        "top_categories": category_breakdown[:5]
+    }
+
+def summary_from_rollup(rollup: Dict[str, Any]) -> Dict[str, Any]:
+    def pairs(field):
+        return [
+            (rollup_value(key), sums['amount'] / 100)
+            for key, sums in rollup.get(field, {}).items()
+            if sums.get('count', 0) > 0
+        ]
+    return build_monthly_summary(rollup.get('total', 0) / 100, rollup.get('count', 0), pairs('categories'), pairs('days'))
+
+def flatten_fields(fields: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Nested rollup fields as dotted paths, e.g. ``categories.Food.amount``."""
+    flat = {}
+    for key, value in fields.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_fields(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+def summary_delta(month: str, version: int, changed: Dict[str, Any]) -> Dict[str, Any]:
+    """Live update event from a month's changed rollup fields (dotted path -> new value).
+
+    Values are the new absolute amounts, not increments, so applying an
+    event twice is harmless. A category or day that no longer has any
+    expenses is sent as null.
+    """
+    event = {"type": "summary", "month": month, "version": version, "categories": {}, "days": {}}
+    if "total" in changed:
+        event["total_expenses"] = changed["total"] / 100
+    if "count" in changed:
+        event["total_count"] = changed["count"]
+    for path, value in changed.items():
+        field, _, rest = path.partition(".")
+        key, _, leaf = rest.rpartition(".")
+        if field not in ("categories", "days") or not key:
+            continue
+        name = rollup_value(key)
+        if leaf == "count" and value <= 0:
+            event[field][name] = None
+        elif leaf == "amount" and event[field].get(name, 0) is not None:
+            event[field][name] = value / 100
+    return event
+
+async def publish_local_changes(user_id: str, increments: Dict[str, Dict[str, int]]):
+    """Read back the rollup fields this worker just changed and publish them."""
+    paths = {path for month_inc in increments.values() for path in month_inc}
+    try:
+        rollups = await db.monthly_rollups.find(
+            {"user_id": user_id, "month": {"$in": list(increments)}},
+            {"_id": 0, "month": 1, "version": 1, **{path: 1 for path in paths}}
+        ).to_list(None)
+    except PyMongoError:
+        logger.exception("Failed to read rollups for live updates of user %s", user_id)
+        return
+    for rollup in rollups:
+        month_inc = increments.get(rollup['month'], {})
+        flat = flatten_fields(rollup)
+        changed = {path: flat[path] for path, value in month_inc.items() if value and path in flat}
+        live_broker.publish(user_id, summary_delta(rollup['month'], rollup.get('version', 0), changed))
+
+def publish_rollup_change(change: Dict[str, Any]) -> None:
+    """Publish one monthly_rollups change stream event to its user's streams."""
+    rollup = change.get('fullDocument') or {}
+    user_id, month = rollup.get('user_id'), rollup.get('month')
+    if not user_id or not month or not live_broker.has_subscribers(user_id):
+        return
+    if change['operationType'] == "update":
+        changed = flatten_fields(change['updateDescription']['updatedFields'])
+    else:
+        changed = flatten_fields({k: v for k, v in rollup.items() if k not in ("_id", "user_id", "month")})
+    version = changed.pop("version", rollup.get('version', 0))
+    live_broker.publish(user_id, summary_delta(month, version, changed))
+
+async def watch_rollup_changes():
+    """Feed live updates from the monthly_rollups change stream, resuming after errors."""
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+    resume_token = None
+    while True:
+        try:
+            async with db.monthly_rollups.watch(
+                pipeline, full_document="updateLookup", resume_after=resume_token
+            ) as stream:
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    publish_rollup_change(change)
+        except OperationFailure as exc:
+            if exc.code == 286:  # ChangeStreamHistoryLost: the token fell off the oplog
+                resume_token = None
+            logger.warning("Rollup change stream failed (%s), restarting", exc)
+            await asyncio.sleep(1)
+        except PyMongoError as exc:
+            logger.warning("Rollup change stream interrupted (%s), resuming", exc)
+            await asyncio.sleep(1)
+
+async def start_live_updates():
+    """Pick the live update source and, for change streams, run the watcher."""
+    global live_source
+    source = LIVE_UPDATES_SOURCE
+    if source == "auto":
+        try:
+            hello = await db.command("hello")
+            replicated = bool(hello.get('setName')) or hello.get('msg') == "isdbgrid"
+        except PyMongoError:
+            replicated = False
+        source = "change_stream" if replicated else "local"
+    live_source = source
+    logger.info("Live summary updates from %s", source)
+    if source == "change_stream":
+        await watch_rollup_changes()
+
+# Range analytics
+ANALYTICS_MAX_BUCKETS = 1000
+
+def bucket_start(day: datetime, bucket: str) -> datetime:
+    """Start of the bucket containing ``day``; weeks start on Monday, like $dateTrunc below."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def next_bucket(start: datetime, bucket: str) -> datetime:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=1)
+
+def bucket_count(start: datetime, end: datetime, bucket: str) -> int:
+    if bucket == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    days = (end - bucket_start(start, bucket)).days
+    return days // 7 + 1 if bucket == "week" else days + 1
+
+def bucket_starts(start: datetime, end: datetime, bucket: str) -> List[datetime]:
+    """Every bucket overlapping [start, end], in order (the dense series)."""
+    starts, current = [], bucket_start(start, bucket)
+    while current <= end:
+        starts.append(current)
+        current = next_bucket(current, bucket)
+    return starts
+
+def range_analytics_pipeline(user_id: str, previous_start: datetime, start: datetime,
+                             end: datetime, bucket: str) -> List[Dict[str, Any]]:
+    """One pass over [previous_start, end]: per (bucket, category) sums for
+    [start, end] and per category sums for the previous period, in paise."""
+    trunc = {"date": "$day", "unit": bucket, "timezone": "UTC"}
+    if bucket == "week":
+        trunc["startOfWeek"] = "monday"
+    return [
+        {"$match": {"user_id": user_id, **date_filter(gte=stored_date(previous_start), lte=stored_date(end))}},
+        {"$project": {"_id": 0, "category": 1, "amount": AMOUNT_PAISE_EXPR, "day": DATE_VALUE_EXPR}},
+        {"$facet": {
+            "current": [
+                {"$match": {"day": {"$gte": start}}},
+                {"$group": {
+                    "_id": {"bucket": {"$dateTrunc": trunc}, "category": "$category"},
+                    "amount": {"$sum": "$amount"},
+                    "count": {"$sum": 1}
+                }}
+            ],
+            "previous": [
+                {"$match": {"day": {"$lt": start}}},
+                {"$group": {"_id": "$category", "amount": {"$sum": "$amount"}, "count": {"$sum": 1}}}
+            ]
+        }}
+    ]
+
+def change_percentage(current: int, previous: int) -> Optional[float]:
+    return round((current - previous) / previous * 100, 2) if previous else None
+
+def build_range_analytics(facets: Dict[str, Any], previous_start: datetime, start: datetime,
+                          end: datetime, bucket: str) -> Dict[str, Any]:
+    """Zero-fill the pipeline's sparse groups into a RangeAnalytics dict."""
+    starts = bucket_starts(start, end, bucket)
+    position = {day.date(): i for i, day in enumerate(starts)}
+    bucket_totals, bucket_counts = [0] * len(starts), [0] * len(starts)
+    matrix: Dict[str, List[int]] = {}
+    for row in facets['current']:
+        i = position[row['_id']['bucket'].date()]
+        matrix.setdefault(row['_id']['category'], [0] * len(starts))[i] += row['amount']
+        bucket_totals[i] += row['amount']
+        bucket_counts[i] += row['count']
+    previous = {row['_id']: row for row in facets['previous']}
+    for category in previous:
+        matrix.setdefault(category, [0] * len(starts))
+
+    categories = []
+    for category, amounts in matrix.items():
+        total = sum(amounts)
+        previous_total = previous[category]['amount'] if category in previous else 0
+        categories.append({
+            "category": category,
+            "amounts": [amount / 100 for amount in amounts],
+            "total": total / 100,
+            "previous_total": previous_total / 100,
+            "change": (total - previous_total) / 100,
+            "change_percentage": change_percentage(total, previous_total),
+        })
+    categories.sort(key=lambda x: (-x['total'], x['category']))
+
+    total, previous_total = sum(bucket_totals), sum(row['amount'] for row in previous.values())
+    return {
+        "start_date": stored_date(start),
+        "end_date": stored_date(end),
+        "bucket": bucket,
+        "previous_start_date": stored_date(previous_start),
+        "previous_end_date": stored_date(start - timedelta(days=1)),
+        "total": total / 100,
+        "count": sum(bucket_counts),
+        "previous_total": previous_total / 100,
+        "previous_count": sum(row['count'] for row in previous.values()),
+        "change": (total - previous_total) / 100,
+        "change_percentage": change_percentage(total, previous_total),
+        "buckets": [
+            {
+                "start": stored_date(day),
+                "total": bucket_totals[i] / 100,
+                "count": bucket_counts[i],
+                "change": (bucket_totals[i] - bucket_totals[i - 1]) / 100 if i else None,
+            }
+            for i, day in enumerate(starts)
+        ],
+        "categories": categories,
+    }
+
+async def compute_monthly_summary(user_id: str, start_date: str, next_month: str):
+    """The encoded summary of a month and the data version it was read at."""
+    rollup = await db.monthly_rollups.find_one({"user_id": user_id, "month": start_date[:7]}, {"_id": 0})
+    if rollup and not rollup.get('complete'):
+        # Created over existing expenses and not seeded yet (see seed_month_rollup)
+        rollup = await seed_month_rollup(user_id, start_date[:7], rollup.get('version', 0))
+    if rollup:
+        return fast_json(summary_from_rollup(rollup)), rollup.get('version', 0)
+    
+    # Month not rolled up yet, or a write raced the seeding: aggregate the
+    # raw expenses server-side instead
+    facets = await db.expenses.aggregate(
+        monthly_summary_pipeline(user_id, start_date, next_month)
+    ).to_list(1)
+    totals = facets[0]['totals']
+    
+    return fast_json(build_monthly_summary(
+        totals[0]['amount'] / 100 if totals else 0,
+        totals[0]['count'] if totals else 0,
+        [(row['_id'], row['amount'] / 100) for row in facets[0]['categories']],
+        [(row['_id'], row['amount'] / 100) for row in facets[0]['daily']]
+    )), 0
+
+def encode_cursor(date, expense_id: str) -> str:
+    """Opaque keyset cursor pointing at the last expense of a page.
+
+    It records whether that row's date was stored as a BSON date ("d") or a
+    legacy string ("s"), since the two sort apart.
+    """
+    kind = "d" if isinstance(date, datetime) else "s"
+    raw = json.dumps([stored_date(date), expense_id, kind], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        date, expense_id, kind = json.loads(raw)
+        if not isinstance(date, str) or not isinstance(expense_id, str) or kind not in ("d", "s"):
+            raise ValueError
+        return (parse_expense_date(date) if kind == "d" else date), expense_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(last_date, last_id: str) -> Dict[str, Any]:
+    """Rows after (last_date, last_id) in (date desc, id desc) order."""
+    after = [
+        {"date": {"$lt": last_date}},
+        {"date": last_date, "id": {"$lt": last_id}}
+    ]
+    if isinstance(last_date, datetime):
+        # Legacy string dates sort below every BSON date
+        after.append({"date": {"$type": "string"}})
+    return {"$or": after}
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    # Sub-requests of /api/batch carry the user the batch already verified;
+    # the key is only ever set in-process, never from the client
+    batch_user_id = request.scope.get(BATCH_USER_SCOPE_KEY)
+    if batch_user_id:
+        return batch_user_id
+    return token_subject(credentials.credentials, 'user_id')
+
+def token_subject(token: str, claim: str) -> str:
+    """The user id stored under ``claim`` in a valid token; 401 otherwise."""
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get('user_id')
+        user_id = payload.get(claim)
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
         return user_id
@@ -151,6 +1279,13 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin routes exist only when ADMIN_TOKEN is set, and require it in X-Admin-Token."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
 # Auth routes (with and without trailing slash to avoid 405 on redirect)
 @api_router.get("/auth/register")
 @api_router.get("/auth/login")
@@ -159,25 +1294,41 @@ async def auth_get_hint():
     return {"detail": "Use POST with JSON body (name, email, password for register; email, password for login)."}
 
 
+# Registration relies on the users.email_unique index to reject duplicate
+# emails. Until it exists (still building, or blocked by duplicates stored
+# before it was added; see DEPLOYMENT.md) sign-ups are refused rather than
+# let through unchecked.
+email_index_ready = False
+
+async def email_unique_index_ready() -> bool:
+    global email_index_ready
+    if not email_index_ready:
+        index = (await db.users.index_information()).get("email_unique", {})
+        email_index_ready = bool(index.get("unique"))
+    return email_index_ready
+
 @api_router.post("/auth/register", response_model=AuthResponse)
 @api_router.post("/auth/register/", response_model=AuthResponse)
 async def register(user_data: UserRegister):
-    # Check if user exists
-    existing = await db.users.find_one({"email": user_data.email}, {"_id": 0})
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Create user
+    if not await email_unique_index_ready():
+        logger.error("Refusing registration: the users.email_unique index is missing")
+        raise HTTPException(
+            status_code=503, detail="Registration is temporarily unavailable", headers={"Retry-After": "30"}
+        )
+    # Create user; the unique index on email rejects duplicates atomically
     user_id = str(uuid.uuid4())
     user_doc = {
         "id": user_id,
         "name": user_data.name,
         "email": user_data.email,
-        "password_hash": hash_password(user_data.password),
+        "password_hash": await run_password_task(hash_password, user_data.password),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.users.insert_one(user_doc)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create token
     token = create_token(user_id)
@@ -196,7 +1347,7 @@ async def register(user_data: UserRegister):
 async def login(user_data: UserLogin):
     # Find user
     user_doc = await db.users.find_one({"email": user_data.email}, {"_id": 0})
-    if not user_doc or not verify_password(user_data.password, user_doc['password_hash']):
+    if not user_doc or not await run_password_task(verify_password, user_data.password, user_doc['password_hash']):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Create token
@@ -227,49 +1378,160 @@ async def get_me(user_id: str = Depends(get_current_user)):
 # Expense routes
 @api_router.post("/expenses", response_model=Expense)
 async def create_expense(expense_data: ExpenseCreate, user_id: str = Depends(get_current_user)):
-    expense_id = str(uuid.uuid4())
-    expense_doc = {
-        "id": expense_id,
-        "user_id": user_id,
-        "amount": expense_data.amount,
-        "category": expense_data.category,
-        "description": expense_data.description,
-        "date": expense_data.date,
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
+    expense_doc = expense_document(user_id, expense_data, datetime.now(timezone.utc))
+    
+    async with expense_write(user_id):
+        await db.expenses.insert_one(expense_doc)
+        await record_expense_change(user_id, None, expense_doc)
     
-    await db.expenses.insert_one(expense_doc)
+    return Expense(**expense_from_doc(expense_doc))
+
+@api_router.post("/expenses/import", response_model=ImportReport)
+async def import_expenses(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    user_id: str = Depends(get_current_user)
+):
+    """Bulk-create expenses from a CSV (with a header row) or NDJSON upload.
+
+    Rows are validated as ``ExpenseCreate`` and written with unordered
+    ``insert_many`` batches; invalid rows are skipped and reported.
+    """
+    fmt = format
+    if not fmt:
+        name = (file.filename or "").lower()
+        if name.endswith(".csv") or file.content_type == "text/csv":
+            fmt = "csv"
+        elif name.endswith((".ndjson", ".jsonl")) or file.content_type in ("application/x-ndjson", "application/jsonl"):
+            fmt = "ndjson"
+        else:
+            raise HTTPException(status_code=400, detail="Cannot tell the upload format; pass format=csv or format=ndjson")
+    
+    records = import_records(file, fmt)
+    created_at = datetime.now(timezone.utc)
+    inserted, errors = 0, []
+    while True:
+        try:
+            # Parsing and validation are CPU bound; keep them off the event loop
+            docs, row_numbers, batch_errors = await asyncio.to_thread(next_import_batch, records, user_id, created_at)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Upload is not valid UTF-8")
+        except csv.Error as exc:
+            raise HTTPException(status_code=400, detail=f"Malformed CSV: {exc}")
+        if not docs and not batch_errors:
+            break
+        errors.extend(batch_errors)
+        if not docs:
+            continue
+        
+        async with expense_write(user_id):
+            failed_indexes = set()
+            try:
+                await db.expenses.insert_many(docs, ordered=False)
+            except BulkWriteError as exc:
+                for write_error in exc.details.get('writeErrors', []):
+                    failed_indexes.add(write_error['index'])
+                    errors.append((row_numbers[write_error['index']], write_error.get('errmsg', 'Write failed')))
+            except (InvalidDocument, OverflowError, ValueError):
+                # A document the driver could not encode; part of the batch may
+                # already be written, so find the bad rows one insert at a time
+                for i, doc in enumerate(docs):
+                    try:
+                        await db.expenses.insert_one(doc)
+                    except DuplicateKeyError:
+                        pass  # written by the insert_many before it failed
+                    except (InvalidDocument, OverflowError, ValueError) as exc:
+                        failed_indexes.add(i)
+                        errors.append((row_numbers[i], f"Cannot store row: {exc}"))
+            written = [doc for i, doc in enumerate(docs) if i not in failed_indexes]
+            inserted += len(written)
+            await record_expense_changes(user_id, [(None, doc) for doc in written])
     
-    # Convert created_at string back to datetime for the response model
-    expense_doc['created_at'] = datetime.fromisoformat(expense_doc['created_at'])
-    return Expense(**expense_doc)
+    errors.sort()
+    return ImportReport(
+        inserted=inserted,
+        failed=len(errors),
+        errors=[ImportRowError(row=row, error=error) for row, error in errors[:IMPORT_MAX_REPORTED_ERRORS]],
+        errors_truncated=len(errors) > IMPORT_MAX_REPORTED_ERRORS
+    )
 
 @api_router.get("/expenses", response_model=List[Expense])
 async def get_expenses(
     user_id: str = Depends(get_current_user),
     category: Optional[str] = None,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    limit: int = Query(EXPENSES_PAGE_MAX, ge=1, le=EXPENSES_PAGE_MAX),
+    cursor: Optional[str] = None,
+    search: Optional[str] = Query(None, max_length=200),
+    if_none_match: Optional[str] = Header(None)
 ):
+    """Expenses newest first, one keyset page at a time.
+
+    ``search`` matches words in the description through the text index
+    (stemmed, case-insensitive) and combines with the other filters.
+
+    When more rows follow, the opaque cursor for the next page is returned in
+    the ``X-Next-Cursor`` header; pass it back as ``cursor`` to continue.
+    Pages carry an ETag that changes whenever any of the user's expenses do.
+    """
     query = {"user_id": user_id}
+    conditions = []
     
     if category:
         query["category"] = category
     
-    if start_date and end_date:
-        query["date"] = {"$gte": start_date, "$lte": end_date}
-    elif start_date:
-        query["date"] = {"$gte": start_date}
-    elif end_date:
-        query["date"] = {"$lte": end_date}
+    if search and search.strip():
+        query["$text"] = {"$search": search}
+    
+    if start_date or end_date:
+        try:
+            conditions.append(date_filter(gte=start_date, lte=end_date))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
     
-    expenses = await db.expenses.find(query, {"_id": 0}).sort("date", -1).to_list(1000)
+    if cursor:
+        # Seek past the last row of the previous page on (date, id) so deep
+        # pages cost the same as the first one
+        conditions.append(keyset_filter(*decode_cursor(cursor)))
     
-    for expense in expenses:
-        if isinstance(expense['created_at'], str):
-            expense['created_at'] = datetime.fromisoformat(expense['created_at'])
+    if conditions:
+        query["$and"] = conditions
     
-    return expenses
+    etag = data_etag(
+        user_id, await user_data_version(user_id), "expenses", category, start_date, end_date, limit, cursor, search
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    expenses = await db.expenses.find(query, {"_id": 0}).sort(
+        [("date", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    headers = {"ETag": etag, "Cache-Control": CONDITIONAL_CACHE_CONTROL}
+    if len(expenses) > limit:
+        expenses = expenses[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(expenses[-1]['date'], expenses[-1]['id'])
+    
+    return FastJSONResponse([expense_json(expense) for expense in expenses], headers=headers)
+
+# Declared before /expenses/{expense_id}, which would otherwise match it
+@api_router.get("/expenses/suggestions", response_model=List[Suggestion])
+async def get_suggestions(
+    q: str = Query(..., min_length=1, max_length=SUGGESTION_MAX_LENGTH),
+    kind: Optional[Literal["description", "category"]] = None,
+    limit: int = Query(10, ge=1, le=50),
+    user_id: str = Depends(get_current_user)
+):
+    """Past descriptions and categories starting with ``q``, most used first."""
+    # An anchored, case-sensitive regex on the lowercased value is an index range scan
+    query = {"user_id": user_id, "value_lower": {"$regex": "^" + re.escape(q.lower())}}
+    if kind:
+        query["kind"] = kind
+    
+    return await db.suggestions.find(query, {"_id": 0, "kind": 1, "value": 1, "count": 1}).sort(
+        [("count", -1), ("value_lower", 1)]
+    ).limit(limit).to_list(limit)
 
 @api_router.get("/expenses/{expense_id}", response_model=Expense)
 async def get_expense(expense_id: str, user_id: str = Depends(get_current_user)):
@@ -277,10 +1539,7 @@ async def get_expense(expense_id: str, user_id: str = Depends(get_current_user))
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
     
-    if isinstance(expense['created_at'], str):
-        expense['created_at'] = datetime.fromisoformat(expense['created_at'])
-    
-    return Expense(**expense)
+    return Expense(**expense_from_doc(expense))
 
 @api_router.put("/expenses/{expense_id}", response_model=Expense)
 async def update_expense(
@@ -288,214 +1547,335 @@ async def update_expense(
     expense_data: ExpenseUpdate,
     user_id: str = Depends(get_current_user)
 ):
-    expense = await db.expenses.find_one({"id": expense_id, "user_id": user_id}, {"_id": 0})
-    if not expense:
-        raise HTTPException(status_code=404, detail="Expense not found")
-    
-    update_data = expense_data.model_dump(exclude_unset=True)
-    if update_data:
-        await db.expenses.update_one({"id": expense_id}, {"$set": update_data})
-        expense.update(update_data)
-    
-    if isinstance(expense['created_at'], str):
-        expense['created_at'] = datetime.fromisoformat(expense['created_at'])
+    # An explicit null leaves the field as it is; none of them may be unset
+    update_data = expense_data.model_dump(exclude_unset=True, exclude_none=True)
+    if not update_data:
+        expense = await db.expenses.find_one({"id": expense_id, "user_id": user_id}, {"_id": 0})
+        if not expense:
+            raise HTTPException(status_code=404, detail="Expense not found")
+    else:
+        # One round trip, scoped to the owner. The pre-image is returned
+        # because the rollups need the old values; $set makes the new
+        # document exactly the pre-image plus update_data.
+        changes = stored_update(update_data)
+        async with expense_write(user_id):
+            before = await db.expenses.find_one_and_update(
+                {"id": expense_id, "user_id": user_id},
+                {"$set": changes},
+                projection={"_id": 0},
+                return_document=ReturnDocument.BEFORE
+            )
+            if not before:
+                raise HTTPException(status_code=404, detail="Expense not found")
+            expense = {**before, **changes}
+            await record_expense_change(user_id, before, expense)
     
-    return Expense(**expense)
+    return Expense(**expense_from_doc(expense))
 
 @api_router.delete("/expenses/{expense_id}")
 async def delete_expense(expense_id: str, user_id: str = Depends(get_current_user)):
-    result = await db.expenses.delete_one({"id": expense_id, "user_id": user_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Expense not found")
+    async with expense_write(user_id):
+        expense = await db.expenses.find_one_and_delete({"id": expense_id, "user_id": user_id}, {"_id": 0})
+        if not expense:
+            raise HTTPException(status_code=404, detail="Expense not found")
+        await record_expense_change(user_id, expense, None)
     return {"message": "Expense deleted"}
 
 @api_router.get("/expenses/summary/monthly", response_model=MonthlySummary)
 async def get_monthly_summary(
     month: str,  # Format: YYYY-MM
-    user_id: str = Depends(get_current_user)
+    user_id: str = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None)
 ):
-    # Calculate date range
-    year, month_num = map(int, month.split('-'))
-    start_date = f"{year}-{month_num:02d}-01"
-    
-    # Calculate last day of month
-    if month_num == 12:
-        next_month = f"{year + 1}-01-01"
-    else:
-        next_month = f"{year}-{month_num + 1:02d}-01"
-    
-    # Query expenses for the month
-    expenses = await db.expenses.find({
-        "user_id": user_id,
-        "date": {"$gte": start_date, "$lt": next_month}
-    }, {"_id": 0}).to_list(10000)
-    
-    # Calculate totals
-    total_expenses = sum(exp['amount'] for exp in expenses)
-    total_count = len(expenses)
-    
-    # Category breakdown
-    category_totals = {}
-    for exp in expenses:
-        cat = exp['category']
-        category_totals[cat] = category_totals.get(cat, 0) + exp['amount']
-    
-    category_breakdown = [
-        {"category": cat, "amount": amt, "percentage": round((amt / total_expenses * 100) if total_expenses > 0 else 0, 2)}
-        for cat, amt in category_totals.items()
-    ]
-    category_breakdown.sort(key=lambda x: x['amount'], reverse=True)
+    start_date, next_month = requested_month_range(month)
+    month = start_date[:7]
     
-    # Daily expenses
-    daily_totals = {}
-    for exp in expenses:
-        date = exp['date']
-        daily_totals[date] = daily_totals.get(date, 0) + exp['amount']
+    version = await month_data_version(user_id, month)
+    etag = data_etag(user_id, version, "summary", month)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {"ETag": etag, "Cache-Control": CONDITIONAL_CACHE_CONTROL}
     
-    daily_expenses = [
-        {"date": date, "amount": amt}
-        for date, amt in sorted(daily_totals.items())
-    ]
+    body = summary_cache.get((user_id, month), version)
+    if body is None:
+        body, version = await compute_monthly_summary(user_id, start_date, next_month)
+        summary_cache.set((user_id, month), version, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+@api_router.post("/expenses/summary/stream/ticket", response_model=StreamTicket)
+async def create_summary_stream_ticket(user_id: str = Depends(get_current_user)):
+    """A short-lived token for opening the summary stream with EventSource."""
+    return StreamTicket(ticket=create_stream_ticket(user_id), expires_in=LIVE_TICKET_TTL_SECONDS)
+
+@api_router.get("/expenses/summary/stream")
+async def stream_summary_updates(ticket: str):
+    """Server-Sent Events with a ``summary`` event after every write to the user's expenses.
+
+    Each event carries the month, its rollup version and the new values of
+    what changed (``total_expenses``, ``total_count``, and the amounts of the
+    touched ``categories`` and ``days``; null when one is now empty). Clients
+    apply events in version order; on a version gap or a ``resync`` event
+    (the client fell behind and events were dropped) they refetch the
+    month's summary. Streams close after LIVE_STREAM_MAX_SECONDS and
+    EventSource reconnects by itself while the ticket is valid.
+    """
+    user_id = token_subject(ticket, 'stream_user_id')
+    try:
+        subscription = live_broker.subscribe(user_id)
+    except TooManyStreams:
+        raise HTTPException(status_code=429, detail="Too many open summary streams")
+    return StreamingResponse(
+        sse_stream(subscription, LIVE_HEARTBEAT_SECONDS, LIVE_RETRY_MS, LIVE_STREAM_MAX_SECONDS),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx-style proxies from holding events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(subscription.close)
+    )
+
+@api_router.get("/expenses/summary/range", response_model=RangeAnalytics)
+async def get_range_analytics(
+    start_date: str,  # YYYY-MM-DD, inclusive
+    end_date: str,  # YYYY-MM-DD, inclusive
+    bucket: Literal["day", "week", "month"] = "month",
+    user_id: str = Depends(get_current_user)
+):
+    """Totals per bucket and category over [start_date, end_date], compared
+    with the period of the same length just before it."""
+    try:
+        start, end = parse_expense_date(start_date), parse_expense_date(end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    if bucket_count(start, end, bucket) > ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range spans more than {ANALYTICS_MAX_BUCKETS} buckets")
+    previous_start = start - (end - start) - timedelta(days=1)
     
-    # Top categories (top 5)
-    top_categories = category_breakdown[:5]
+    facets = await db.expenses.aggregate(
+        range_analytics_pipeline(user_id, previous_start, start, end, bucket)
+    ).to_list(1)
     
-    return MonthlySummary(
-        total_expenses=total_expenses,
-        total_count=total_count,
-        category_breakdown=category_breakdown,
-        daily_expenses=daily_expenses,
-        top_categories=top_categories
-    )
+    return FastJSONResponse(build_range_analytics(facets[0], previous_start, start, end, bucket))
 
 @api_router.get("/expenses/export/pdf")
 async def export_pdf(
     month: str,  # Format: YYYY-MM
     user_id: str = Depends(get_current_user)
 ):
-    # Get expenses
-    year, month_num = map(int, month.split('-'))
-    start_date = f"{year}-{month_num:02d}-01"
-    if month_num == 12:
-        next_month = f"{year + 1}-01-01"
-    else:
-        next_month = f"{year}-{month_num + 1:02d}-01"
+    month = requested_month_range(month)[0][:7]
+    version = await month_data_version(user_id, month)
+    cached = export_cache.get(user_id, month, "pdf", version)
+    if not cached:
+        pdf = await render_export(user_id, month, "pdf")
+        cached = await asyncio.to_thread(export_cache.put, user_id, month, "pdf", version, pdf)
     
-    expenses = await db.expenses.find({
-        "user_id": user_id,
-        "date": {"$gte": start_date, "$lt": next_month}
-    }, {"_id": 0}).sort("date", 1).to_list(10000)
-    
-    # Create PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title = Paragraph(f"<b>Expense Report - {month}</b>", styles['Title'])
-    elements.append(title)
-    elements.append(Spacer(1, 20))
-    
-    # Summary
-    total = sum(exp['amount'] for exp in expenses)
-    summary = Paragraph(f"<b>Total Expenses: ₹{total:,.2f}</b>", styles['Heading2'])
-    elements.append(summary)
-    elements.append(Spacer(1, 20))
-    
-    # Table
-    table_data = [['Date', 'Category', 'Description', 'Amount (₹)']]
-    for exp in expenses:
-        table_data.append([
-            exp['date'],
-            exp['category'],
-            exp['description'][:30],
-            f"₹{exp['amount']:,.2f}"
-        ])
-    
-    table = Table(table_data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    elements.append(table)
-    
-    doc.build(elements)
-    buffer.seek(0)
-    
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=expenses_{month}.pdf"}
-    )
+    return export_file_response(cached, month, "pdf")
 
 @api_router.get("/expenses/export/excel")
 async def export_excel(
     month: str,  # Format: YYYY-MM
     user_id: str = Depends(get_current_user)
 ):
-    # Get expenses
-    year, month_num = map(int, month.split('-'))
-    start_date = f"{year}-{month_num:02d}-01"
-    if month_num == 12:
-        next_month = f"{year + 1}-01-01"
-    else:
-        next_month = f"{year}-{month_num + 1:02d}-01"
-    
-    expenses = await db.expenses.find({
-        "user_id": user_id,
-        "date": {"$gte": start_date, "$lt": next_month}
-    }, {"_id": 0}).sort("date", 1).to_list(10000)
-    
-    # Create Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Expenses"
-    
-    # Headers
-    headers = ['Date', 'Category', 'Description', 'Amount (₹)']
-    ws.append(headers)
+    month = requested_month_range(month)[0][:7]
+    version = await month_data_version(user_id, month)
+    cached = export_cache.get(user_id, month, "excel", version)
+    if cached:
+        return export_file_response(cached, month, "excel")
     
-    # Style headers
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="6366F1", end_color="6366F1", fill_type="solid")
+    # Rows are read from the cursor batch by batch and the file is streamed
+    # while it is produced, so memory does not grow with the month's size
+    return StreamingResponse(
+        cache_while_streaming(stream_excel(month_expense_batches(user_id, month)), user_id, month, "excel", version),
+        media_type=EXCEL_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename=expenses_{month}.xlsx"}
+    )
+
+# Export jobs: submit, poll, then download the cached file
+@api_router.post("/expenses/export/jobs", response_model=ExportJob, status_code=202)
+async def create_export_job(job_data: ExportJobCreate, user_id: str = Depends(get_current_user)):
+    month = requested_month_range(job_data.month)[0][:7]
     
-    # Data
-    for exp in expenses:
-        ws.append([exp['date'], exp['category'], exp['description'], exp['amount']])
+    version = await month_data_version(user_id, month)
+    cached = export_cache.get(user_id, month, job_data.format, version)
+    job = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "month": month,
+        "format": job_data.format,
+        "version": version,
+        "status": "done" if cached else "pending",
+        "error": None,
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.export_jobs.insert_one(dict(job))
     
-    # Summary
-    ws.append([])
-    total = sum(exp['amount'] for exp in expenses)
-    ws.append(['Total', '', '', total])
+    if not cached:
+        task = asyncio.create_task(run_export_job(job))
+        export_job_tasks.add(task)
+        task.add_done_callback(export_job_tasks.discard)
     
-    # Save to buffer
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    return ExportJob(**job)
+
+@api_router.get("/expenses/export/jobs/{job_id}", response_model=ExportJob)
+async def get_export_job(job_id: str, user_id: str = Depends(get_current_user)):
+    job = await db.export_jobs.find_one({"id": job_id, "user_id": user_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return ExportJob(**job)
+
+@api_router.get("/expenses/export/jobs/{job_id}/download")
+async def download_export_job(job_id: str, user_id: str = Depends(get_current_user)):
+    job = await db.export_jobs.find_one({"id": job_id, "user_id": user_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job['status'] != "done":
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
     
-    return StreamingResponse(
-        buffer,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename=expenses_{month}.xlsx"}
-    )
+    path = export_cache.get(user_id, job['month'], job['format'], job['version'])
+    if not path:
+        # Evicted, or the month changed since the job ran
+        raise HTTPException(status_code=410, detail="Export expired, submit a new job")
+    return export_file_response(path, job['month'], job['format'])
 
 # Root and health (avoid 404 when someone opens backend URL in browser)
 @app.get("/")
 async def root():
     return {"message": "VividExpense API", "docs": "/docs", "api": "/api"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return metrics_response()
 
 @api_router.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "password_hashing": {
+            "workers": PASSWORD_HASH_WORKERS,
+            "in_flight": password_tasks_in_flight,
+            "queue_depth": password_queue_depth()
+        },
+        "summary_cache": summary_cache.stats(),
+        "mongo_pool": pool_status(),
+        "email_unique_index": email_index_ready,
+        "live_updates": {"source": live_source, **live_broker.stats()}
+    }
+
+def pool_status() -> Dict[str, Any]:
+    max_pool_size = MONGO_POOL_OPTIONS["maxPoolSize"]
+    return {
+        "max_pool_size": max_pool_size,
+        "checked_out": pool_metrics.checked_out,
+        "waiting": pool_metrics.waiting,
+        "saturation": round(pool_metrics.checked_out / max_pool_size, 3) if max_pool_size else None,
+    }
+
+@api_router.get("/health/live")
+async def liveness():
+    """The process is up and its event loop is answering; no dependencies checked."""
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+async def readiness():
+    """Whether this worker can serve traffic now: 503 when MongoDB does not
+    answer a ping within READINESS_PING_TIMEOUT_MS, or when every pooled
+    connection is in use and requests are already queueing for one."""
+    pool = pool_status()
+    problems = []
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_PING_TIMEOUT)
+    except asyncio.TimeoutError:
+        problems.append("database ping timed out")
+    except PyMongoError as exc:
+        problems.append(f"database unavailable: {exc.__class__.__name__}")
+    if pool["max_pool_size"] and pool["checked_out"] >= pool["max_pool_size"] and pool["waiting"] > 0:
+        problems.append("connection pool exhausted")
+    
+    body = {"status": "not ready" if problems else "ready", "problems": problems, "pool": pool}
+    return FastJSONResponse(body, status_code=503 if problems else 200)
+
+
+async def run_batch_item(parent_scope: Dict[str, Any], user_id: str, item: BatchItem) -> bytes:
+    """Run one GET through the app in-process; returns its encoded result.
+
+    The sub-request goes through the full ASGI app, so error handling works
+    as usual, but it skips the token check and is counted in the metrics as
+    a batch sub-request rather than as another HTTP request.
+    """
+    path, _, query = item.path.partition("?")
+    headers = [(b"authorization", dict(parent_scope["headers"]).get(b"authorization", b""))]
+    headers += [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in item.headers.items() if name.lower() in BATCH_REQUEST_HEADERS
+    ]
+    scope = {
+        "type": "http", "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent_scope.get("http_version", "1.1"), "scheme": parent_scope.get("scheme", "http"),
+        "server": parent_scope.get("server"), "client": parent_scope.get("client"),
+        "root_path": parent_scope.get("root_path", ""), "state": {},
+        "method": item.method, "path": path, "raw_path": path.encode("utf-8"),
+        "query_string": query.encode("utf-8"), "headers": headers,
+        BATCH_USER_SCOPE_KEY: user_id, SUBREQUEST_SCOPE_KEY: True,
+    }
+    response_start: Dict[str, Any] = {}
+    body = []
+    finished = asyncio.Event()
+
+    async def receive():
+        if not finished.is_set():
+            finished.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Nothing more to read; a streaming response waits here for a disconnect
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response_start.update(message)
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+        status_code = response_start["status"]
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", item.method, item.path)
+        # Replace the plain-text error page the app may already have sent
+        response_start.clear()
+        status_code, body = 500, [b'{"detail":"Internal Server Error"}']
+
+    response_headers = {
+        name.decode("latin-1"): value.decode("latin-1")
+        for name, value in response_start.get("headers", ()) if name.decode("latin-1") in BATCH_RESPONSE_HEADERS
+    }
+    content_type = dict(response_start.get("headers", ())).get(b"content-type", b"application/json")
+    payload = b"".join(body)
+    if not payload:
+        payload = b"null"
+    elif not content_type.startswith(b"application/json"):
+        payload = fast_json({"detail": "Not a JSON response; request it directly"})
+        status_code = 415
+    # The sub-response body is already JSON; splice it in rather than re-encoding it
+    head = fast_json({"id": item.id, "status": status_code, "headers": response_headers})
+    return head[:-1] + b',"body":' + payload + b"}"
+
+@api_router.post("/batch")
+async def batch(batch_request: BatchRequest, request: Request, user_id: str = Depends(get_current_user)):
+    """Run several GET requests against the API in one round trip.
+
+    The token is verified once for the whole batch and the sub-requests run
+    concurrently. Each result has the sub-request's ``id``, ``status``,
+    selected ``headers`` (ETag, Cache-Control, X-Next-Cursor) and JSON
+    ``body``, in request order; a failing sub-request doesn't fail the batch.
+    """
+    results = await asyncio.gather(*(run_batch_item(request.scope, user_id, item) for item in batch_request.requests))
+    return Response(b'{"responses":[' + b",".join(results) + b"]}", media_type="application/json")
+
+
+@api_router.get("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def get_slow_queries(limit: int = Query(10, ge=1, le=100)):
+    """The slowest MongoDB query shapes seen by this worker since startup."""
+    return {"threshold_ms": slow_query_log.threshold_ms, "shapes": slow_query_log.top(limit)}
 
 
 # Include the router in the main app
@@ -507,7 +1887,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
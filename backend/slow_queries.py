@@ -0,0 +1,218 @@
+"""Slow MongoDB command log with automatic explain capture.
+
+``SlowQueryLog`` is a pymongo command listener. Any command slower than the
+threshold is recorded under its *shape* (collection, command, filter or
+pipeline with every value redacted, sort). The first time a shape is slow,
+and then at most once per interval, it is re-run with
+``explain("executionStats")`` and a JSON line is logged with documents
+examined vs. returned and the winning plan (stages and indexes, its values
+redacted as well). ``top()`` feeds the admin endpoint listing the slowest
+shapes since startup.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger("slow_queries")
+
+# Reads that can be explained as-is; writes are logged without a plan
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+# Fields the driver adds to every command; not part of the query
+DRIVER_FIELDS = {"$db", "lsid", "$clusterTime", "txnNumber", "$readPreference", "readConcern",
+                 "writeConcern", "autocommit", "startTransaction", "apiVersion", "$audit"}
+# Command fields kept verbatim in the shape (field names and directions only)
+VERBATIM_FIELDS = {"sort", "projection"}
+# Explain plan fields kept verbatim; everything else but child stages is
+# redacted, since filters and index bounds hold the query's values
+PLAN_VERBATIM_FIELDS = {"stage", "indexName", "keyPattern", "direction", "isMultiKey", "isUnique",
+                        "isSparse", "isPartial", "planNodeId"}
+PLAN_CHILD_FIELDS = {"inputStage", "inputStages", "queryPlan", "thenStage", "elseStage", "outerStage", "innerStage"}
+
+
+def redact(value: Any) -> Any:
+    """Replace every literal in a filter or pipeline with ``"?"``.
+
+    Keys, operators and ``$field`` references are kept, so two queries
+    differing only in their values share a shape.
+    """
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def redact_plan(plan: Any) -> Any:
+    """A winning plan with stage, index names and key patterns only; other values redacted."""
+    if isinstance(plan, list):
+        return [redact_plan(item) for item in plan]
+    if not isinstance(plan, dict):
+        return redact(plan)
+    return {
+        key: item if key in PLAN_VERBATIM_FIELDS else redact_plan(item) if key in PLAN_CHILD_FIELDS else redact(item)
+        for key, item in plan.items()
+    }
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    shape = {"collection": command.get(command_name), "command": command_name}
+    for field, item in command.items():
+        if field == command_name or field in DRIVER_FIELDS:
+            continue
+        if field in ("filter", "query", "pipeline", "q", "updates", "deletes", "update"):
+            shape[field] = redact(item)
+        elif field in VERBATIM_FIELDS:
+            shape[field] = item
+    return shape
+
+
+def returned_count(command_name: str, reply: Dict[str, Any]) -> Optional[int]:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name in ("count", "delete", "update", "insert"):
+        return reply.get("n")
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    return None
+
+
+def find_key(node: Any, key: str) -> Any:
+    """First value stored under ``key`` anywhere in an explain document."""
+    if isinstance(node, dict):
+        if key in node:
+            return node[key]
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+def plan_stages(plan: Any) -> List[str]:
+    stages = []
+    while isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0] or plan.get("queryPlan")
+    return stages
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    stats = find_key(explain, "executionStats") or {}
+    winning = find_key(explain, "winningPlan")
+    return {
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "n_returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+        "stages": plan_stages(winning),
+        "winning_plan": redact_plan(winning) if winning is not None else None,
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Collects slow commands by shape; see the module docstring.
+
+    Listener callbacks run on the driver's threads, so explains are handed
+    to the event loop registered with ``attach``.
+    """
+
+    def __init__(self, threshold_ms: float, log_interval: float = 60.0, max_shapes: int = 500):
+        self.threshold_ms = threshold_ms
+        self.log_interval = log_interval
+        self.max_shapes = max_shapes
+        self._pending: Dict[tuple, Dict[str, Any]] = {}
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._db = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop, db) -> None:
+        """Run explains on ``loop`` against ``db`` from now on."""
+        self._loop, self._db = loop, db
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE or event.command_name in ("findAndModify", "update", "delete"):
+            self._pending[(event.request_id, event.connection_id)] = event.command
+
+    def failed(self, event):
+        self._pending.pop((event.request_id, event.connection_id), None)
+
+    def succeeded(self, event):
+        command = self._pending.pop((event.request_id, event.connection_id), None)
+        duration_ms = event.duration_micros / 1000
+        if command is None or duration_ms < self.threshold_ms:
+            return
+        shape = command_shape(event.command_name, command)
+        key = hashlib.sha1(json.dumps(shape, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+        now = time.time()
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    return
+                entry = self._shapes[key] = {
+                    "shape_id": key, "shape": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "last_seen": None, "explain": None, "_logged_at": 0.0,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_seen"] = now
+            due = now - entry["_logged_at"] >= self.log_interval
+            if due:
+                entry["_logged_at"] = now
+        if not due:
+            return
+        record = {
+            "event": "slow_query", "shape_id": key, **shape,
+            "duration_ms": round(duration_ms, 3),
+            "returned": returned_count(event.command_name, event.reply),
+        }
+        if event.command_name in EXPLAINABLE and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(
+                lambda: asyncio.ensure_future(self._explain_and_log(key, event.command_name, command, record))
+            )
+        else:
+            logger.warning(json.dumps(record, default=str))
+
+    async def _explain_and_log(self, key: str, command_name: str, command: Dict[str, Any], record: Dict[str, Any]):
+        query = {field: item for field, item in command.items() if field not in DRIVER_FIELDS}
+        try:
+            explain = await self._db.command("explain", query, verbosity="executionStats")
+            summary = summarize_explain(explain)
+            with self._lock:
+                self._shapes[key]["explain"] = summary
+            record.update({k: v for k, v in summary.items() if k != "winning_plan"}, winning_plan=summary["winning_plan"])
+        except PyMongoError as exc:
+            record["explain_error"] = str(exc)
+        logger.warning(json.dumps(record, default=str))
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """The ``limit`` shapes with the slowest single execution."""
+        with self._lock:
+            entries = sorted(self._shapes.values(), key=lambda e: -e["max_ms"])[:limit]
+            return [
+                {
+                    **{k: v for k, v in entry.items() if not k.startswith("_")},
+                    "mean_ms": round(entry["total_ms"] / entry["count"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "total_ms": round(entry["total_ms"], 3),
+                }
+                for entry in entries
+            ]
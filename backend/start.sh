@@ -1,3 +1,9 @@
 #!/bin/bash
-# Start script for Render deployment
-uvicorn server:app --host 0.0.0.0 --port ${PORT:-8000}
+# Start script for Render deployment: Uvicorn workers under Gunicorn, one per
+# CPU unless WEB_CONCURRENCY is set (see gunicorn.conf.py)
+set -e
+# Bring every expense to the current storage schema before serving; list
+# order assumes one date format. Resumes from its checkpoint, so after the
+# first deploy this only reads the documents written since the last one.
+python manage.py migrate-schema
+exec gunicorn -c gunicorn.conf.py server:app
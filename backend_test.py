@@ -2,7 +2,9 @@ import requests
 import sys
 import json
 from datetime import datetime, timedelta
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 class ExpenseTrackerAPITester:
     def __init__(self, base_url="https://spendwise-1376.preview.emergentagent.com"):
@@ -193,6 +195,48 @@ class ExpenseTrackerAPITester:
         )
         return success
 
+    def test_concurrent_duplicate_registration(self, attempts=8):
+        """Test that racing registrations for one email create exactly one user"""
+        user_data = {
+            "name": "Race User",
+            "email": f"race_{uuid.uuid4().hex[:8]}@example.com",
+            "password": "TestPass123!"
+        }
+        
+        def register(_):
+            try:
+                return requests.post(f"{self.api_url}/auth/register", json=user_data, timeout=30).status_code
+            except Exception as e:
+                return str(e)
+        
+        with ThreadPoolExecutor(max_workers=attempts) as pool:
+            statuses = list(pool.map(register, range(attempts)))
+        
+        success = statuses.count(200) == 1 and statuses.count(400) == attempts - 1
+        self.log_test("Concurrent Duplicate Registration", success, "" if success else f"Statuses: {statuses}")
+        return success
+
+    def test_update_other_users_expense(self, expense_id):
+        """Test that another user cannot update an expense they do not own"""
+        other = requests.post(f"{self.api_url}/auth/register", json={
+            "name": "Other User",
+            "email": f"other_{uuid.uuid4().hex[:8]}@example.com",
+            "password": "TestPass123!"
+        }, timeout=30)
+        if other.status_code != 200:
+            self.log_test("Update Other User's Expense", False, f"Could not register second user: {other.status_code}")
+            return False
+        
+        success, _ = self.run_test(
+            "Update Other User's Expense",
+            "PUT",
+            f"expenses/{expense_id}",
+            404,
+            data={"amount": 1},
+            headers={'Authorization': f"Bearer {other.json()['token']}"}
+        )
+        return success
+
     def test_expense_filters(self):
         """Test expense filtering"""
         # Test category filter
@@ -242,6 +286,130 @@ class ExpenseTrackerAPITester:
             return True
         return False
 
+    def test_conditional_get(self):
+        """Test ETag revalidation of the list and summary, and its invalidation by writes"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        this_month = datetime.now().strftime('%Y-%m')
+        other_month = (datetime.now().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+        endpoints = {
+            "list": f"{self.api_url}/expenses",
+            "summary": f"{self.api_url}/expenses/summary/monthly?month={this_month}",
+            "other summary": f"{self.api_url}/expenses/summary/monthly?month={other_month}",
+        }
+        
+        def etags():
+            return {name: requests.get(url, headers=headers, timeout=30).headers.get('ETag') for name, url in endpoints.items()}
+        
+        def unchanged(tags):
+            """Names of the endpoints still answering 304 to the given ETags"""
+            return {
+                name for name, url in endpoints.items()
+                if requests.get(url, headers={**headers, 'If-None-Match': tags[name]}, timeout=30).status_code == 304
+            }
+        
+        try:
+            tags = etags()
+            if not all(tags.values()):
+                self.log_test("Conditional GET", False, f"Missing ETag: {tags}")
+                return False
+            if unchanged(tags) != set(endpoints):
+                self.log_test("Conditional GET", False, "Matching If-None-Match did not return 304")
+                return False
+            self.log_test("Conditional GET", True)
+            
+            created = requests.post(f"{self.api_url}/expenses", headers=headers, timeout=30, json={
+                "amount": 12.5, "category": "Food", "description": "ETag check",
+                "date": datetime.now().strftime('%Y-%m-%d')
+            })
+            expense_id = created.json()['id']
+            still = unchanged(tags)
+            self.log_test("ETag Invalidated By Create", still == {"other summary"}, f"Still 304: {still}")
+            
+            tags = etags()
+            requests.put(f"{self.api_url}/expenses/{expense_id}", headers=headers, timeout=30, json={
+                "date": f"{other_month}-15"
+            })
+            still = unchanged(tags)
+            self.log_test("ETag Invalidated By Month Move", not still, f"Still 304: {still}")
+            
+            tags = etags()
+            requests.delete(f"{self.api_url}/expenses/{expense_id}", headers=headers, timeout=30)
+            still = unchanged(tags)
+            self.log_test("ETag Invalidated By Delete", still == {"summary"}, f"Still 304: {still}")
+            return True
+        except Exception as e:
+            self.log_test("Conditional GET", False, str(e))
+            return False
+
+    def test_batch(self):
+        """Test /api/batch against the individual dashboard requests"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        current_month = datetime.now().strftime('%Y-%m')
+        paths = {
+            "me": "/api/auth/me",
+            "expenses": "/api/expenses",
+            "summary": f"/api/expenses/summary/monthly?month={current_month}",
+            "missing": "/api/expenses/does-not-exist",
+        }
+        try:
+            response = requests.post(f"{self.api_url}/batch", headers=headers, timeout=30, json={
+                "requests": [{"id": name, "path": path} for name, path in paths.items()]
+            })
+            if response.status_code != 200:
+                self.log_test("Batch Request", False, f"Status {response.status_code}: {response.text}")
+                return False
+            results = {item['id']: item for item in response.json()['responses']}
+            for name in ("me", "expenses", "summary"):
+                single = requests.get(f"{self.base_url}{paths[name]}", headers=headers, timeout=30).json()
+                if results[name]['status'] != 200 or results[name]['body'] != single:
+                    self.log_test("Batch Request", False, f"{name} differs from the direct request")
+                    return False
+            self.log_test("Batch Request", results['missing']['status'] == 404, f"missing: {results['missing']}")
+            
+            unauthenticated = requests.post(f"{self.api_url}/batch", timeout=30, json={"requests": [{"path": "/api/auth/me"}]})
+            self.log_test("Batch Requires Auth", unauthenticated.status_code in (401, 403), f"Status {unauthenticated.status_code}")
+            return True
+        except Exception as e:
+            self.log_test("Batch Request", False, str(e))
+            return False
+
+    def test_live_summary_stream(self):
+        """Test that a write is pushed to an open summary stream"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        month = datetime.now().strftime('%Y-%m')
+        
+        def first_summary_event(ticket):
+            with requests.get(f"{self.api_url}/expenses/summary/stream", params={"ticket": ticket},
+                              stream=True, timeout=30) as response:
+                if response.status_code != 200:
+                    return f"Status {response.status_code}"
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data:"):
+                        event = json.loads(line[5:])
+                        if event.get("type") == "summary" and event.get("month") == month:
+                            return event
+        
+        try:
+            ticket = requests.post(f"{self.api_url}/expenses/summary/stream/ticket", headers=headers, timeout=30).json()['ticket']
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                event = pool.submit(first_summary_event, ticket)
+                # Give the stream a moment to subscribe before writing
+                time.sleep(1)
+                requests.post(f"{self.api_url}/expenses", headers=headers, timeout=30, json={
+                    "amount": 3.25, "category": "Food", "description": "Live update check",
+                    "date": datetime.now().strftime('%Y-%m-%d')
+                })
+                result = event.result(timeout=30)
+            success = isinstance(result, dict) and "total_expenses" in result and result.get("categories", {}).get("Food") is not None
+            self.log_test("Live Summary Stream", success, "" if success else f"Got: {result}")
+            
+            rejected = requests.get(f"{self.api_url}/auth/me", headers={'Authorization': f'Bearer {ticket}'}, timeout=30)
+            self.log_test("Stream Ticket Is Not A Token", rejected.status_code == 401, f"Status {rejected.status_code}")
+            return success
+        except Exception as e:
+            self.log_test("Live Summary Stream", False, str(e))
+            return False
+
     def test_export_pdf(self):
         """Test PDF export"""
         current_month = datetime.now().strftime('%Y-%m')
@@ -300,6 +468,9 @@ class ExpenseTrackerAPITester:
         # Test user profile
         self.test_get_user_profile()
         
+        # Test duplicate-email race
+        self.test_concurrent_duplicate_registration()
+        
         # Create test expenses
         expense_ids = []
         categories = ["Food", "Transport", "Shopping", "Entertainment"]
@@ -325,6 +496,7 @@ class ExpenseTrackerAPITester:
             
             # Test update
             self.test_update_expense(first_expense_id)
+            self.test_update_other_users_expense(first_expense_id)
             
             # Test filters
             self.test_expense_filters()
@@ -332,6 +504,15 @@ class ExpenseTrackerAPITester:
             # Test monthly summary
             self.test_monthly_summary()
             
+            # Test ETag revalidation and invalidation
+            self.test_conditional_get()
+            
+            # Test batched dashboard requests
+            self.test_batch()
+            
+            # Test live summary updates
+            self.test_live_summary_stream()
+            
             # Test exports
             self.test_export_pdf()
             self.test_export_excel()